@@ -9,6 +9,7 @@ import interface
 import logger
 import preproc
 import adjacency
+import adjproc
 import globaltopo
 import nodetopo
 import edgetopo
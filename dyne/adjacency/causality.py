@@ -0,0 +1,210 @@
+"""
+Causality pipes for quantifying directed signal influence (i.e. effective
+connectivity)
+
+Created by: Ankit Khambhati
+
+Change Log
+----------
+2026/10/18 - Implemented Granger pipe
+"""
+
+from __future__ import division
+import numpy as np
+
+from ..errors import check_type
+from ..base import AdjacencyPipe
+
+
+def _lagged_gram(signal, order):
+    """
+    Gram matrices of the present samples and the lagged samples of a VAR
+
+    Lagged regressors are ordered lag-major, column lag*n_node + node holds
+    node at lag+1. Any leading axes (e.g. bands) are batched.
+
+    Returns
+    -------
+        gram_yy: numpy.ndarray, shape: [... x n_node x n_node]
+        gram_zy: numpy.ndarray, shape: [... x order*n_node x n_node]
+        gram_zz: numpy.ndarray, shape: [... x order*n_node x order*n_node]
+    """
+
+    n_sample, n_node = signal.shape[-2:]
+    signal = signal - signal.mean(axis=-2, keepdims=True)
+
+    design = np.concatenate(
+        [signal[..., order:, :]] +
+        [signal[..., order-lag:n_sample-lag, :]
+         for lag in xrange(1, order+1)], axis=-1)
+    gram = np.matmul(np.swapaxes(design, -1, -2), design)
+
+    return (gram[..., :n_node, :n_node],
+            gram[..., n_node:, :n_node],
+            gram[..., n_node:, n_node:])
+
+
+def _node_blocks(gram, order, n_node):
+    """
+    Rearrange a lag-major Gram matrix into per-node blocks of lags
+
+    [... x order*n_node x order*n_node] -> [... x n_node x n_node x order x
+    order], block [node_x, node_y] relates the lags of node_x to node_y.
+    """
+
+    n_lead = gram.ndim - 2
+    gram = gram.reshape(gram.shape[:-2] + (order, n_node, order, n_node))
+    return gram.transpose(range(n_lead) +
+                          [n_lead+1, n_lead+3, n_lead, n_lead+2])
+
+
+def _solve_quad(matr, vec):
+    """Quadratic form vec^T matr^-1 vec for stacks of matrices and vectors"""
+    return np.sum(vec * np.linalg.solve(matr, vec[..., np.newaxis])[..., 0],
+                  axis=-1)
+
+
+class Granger(AdjacencyPipe):
+    """
+    Granger pipe for directed Granger causality between signals
+
+    Granger causality from a source to a target is log(RSS_r / RSS_f), the
+    log ratio of residual variance of a VAR model of the target without and
+    with the past of the source. All models of a window are solved from one
+    shared Gram matrix of the present and lagged samples, rather than by
+    fitting each pair separately:
+
+        'bivariate' - for every target its own-past model is solved once,
+            and each source enters through the Schur complement of its lags,
+            a batch of order x order solves over all pairs
+        'multivariate' - one VAR of all nodes is solved, and the influence
+            of each source, conditioned on all other nodes, follows from the
+            lag block of the inverse Gram matrix shared by every target
+
+    The adjacency is asymmetric, adj[source, target] holds the causality
+    from the node of ax_0 to the node of ax_1, and the diagonal is 0.
+    Signals with a leading band axis yield one adjacency matrix per band.
+
+    Parameters
+    ----------
+        order: int
+            Number of lagged samples in the VAR model
+
+        model: str
+            VAR model to fit, 'bivariate' (pairwise) or 'multivariate'
+            (conditional on all other nodes)
+    """
+
+    def __init__(self, order, model='bivariate'):
+        # Standard param checks
+        check_type(order, int)
+        check_type(model, str)
+        if order < 1:
+            raise ValueError('order must be at least 1')
+        if model not in ['bivariate', 'multivariate']:
+            raise ValueError('%r is not a supported VAR model' % model)
+
+        # Assign to instance
+        self.order = order
+        self.model = model
+
+    def _bivariate(self, gram_yy, gram_zy, gram_zz):
+        """Pairwise Granger causality, [... x n_target x n_source]"""
+        n_node = gram_yy.shape[-1]
+        diag_ix = np.arange(n_node)
+
+        # Lag blocks, lag_zz[..., x, y] and lag_zy[..., x, t] = lags of x . t
+        lag_zz = _node_blocks(gram_zz, self.order, n_node)
+        lag_zy = np.swapaxes(
+            gram_zy.reshape(gram_zy.shape[:-2] +
+                            (self.order, n_node, n_node)), -3, -1)
+        lag_zy = np.swapaxes(lag_zy, -3, -2)
+
+        # Restricted model of each target on its own past
+        own_zz = lag_zz[..., diag_ix, diag_ix, :, :]
+        own_zy = lag_zy[..., diag_ix, diag_ix, :]
+        own_beta = np.linalg.solve(own_zz, own_zy[..., np.newaxis])
+        rss_r = gram_yy[..., diag_ix, diag_ix] - \
+            np.sum(own_zy * own_beta[..., 0], axis=-1)
+
+        # Schur complement of the source lags given the target lags,
+        # indexed [..., target, source]
+        cross_zz = np.swapaxes(lag_zz, -4, -3)
+        schur = lag_zz[..., np.newaxis, diag_ix, diag_ix, :, :] - \
+            np.matmul(cross_zz,
+                      np.linalg.solve(own_zz[..., np.newaxis, :, :], lag_zz))
+        resid = np.swapaxes(lag_zy, -3, -2) - \
+            np.matmul(cross_zz, own_beta[..., np.newaxis, :, :])[..., 0]
+
+        # A node does not cause itself
+        schur[..., diag_ix, diag_ix, :, :] = np.eye(self.order)
+        resid[..., diag_ix, diag_ix, :] = 0
+
+        rss_f = rss_r[..., np.newaxis] - _solve_quad(schur, resid)
+
+        return np.log(rss_r[..., np.newaxis] / rss_f)
+
+    def _multivariate(self, gram_yy, gram_zy, gram_zz):
+        """Conditional Granger causality, [... x n_target x n_source]"""
+        n_node = gram_yy.shape[-1]
+        diag_ix = np.arange(n_node)
+
+        # Full model of every target on the past of all nodes
+        gram_inv = np.linalg.inv(gram_zz)
+        beta = np.matmul(gram_inv, gram_zy)
+        rss_f = gram_yy[..., diag_ix, diag_ix] - \
+            np.sum(gram_zy * beta, axis=-2)
+
+        # Dropping the lags of a source raises the RSS of every target by
+        # beta^T inv(gram_inv[lags, lags]) beta, indexed [..., target, source]
+        lag_inv = _node_blocks(gram_inv, self.order,
+                               n_node)[..., diag_ix, diag_ix, :, :]
+        lag_beta = beta.reshape(beta.shape[:-2] +
+                                (self.order, n_node, n_node))
+        lag_beta = np.swapaxes(lag_beta, -3, -1)
+        rss_r = rss_f[..., np.newaxis] + \
+            _solve_quad(lag_inv[..., np.newaxis, :, :, :], lag_beta)
+
+        return np.log(rss_r / rss_f[..., np.newaxis])
+
+    def _pipe_as_flow(self, signal_packet):
+        # Get signal_packet details
+        hkey = signal_packet.keys()[0]
+        signal = np.asarray(signal_packet[hkey]['data'], dtype=np.float64)
+        n_sample, n_node = signal.shape[-2:]
+
+        n_regressor = self.order*(2 if self.model == 'bivariate' else n_node)
+        if n_sample - self.order <= n_regressor:
+            raise ValueError('Window of %d samples is too short to fit a' %
+                             n_sample + ' VAR with %d regressors' %
+                             n_regressor)
+
+        gram_yy, gram_zy, gram_zz = _lagged_gram(signal, self.order)
+        if self.model == 'bivariate':
+            causality = self._bivariate(gram_yy, gram_zy, gram_zz)
+        else:
+            causality = self._multivariate(gram_yy, gram_zy, gram_zz)
+
+        # Orient as [source, target], clip rounding below zero
+        adj = np.maximum(np.swapaxes(causality, -1, -2), 0)
+        diag_ix = np.arange(n_node)
+        adj[..., diag_ix, diag_ix] = 0
+
+        new_packet = {}
+        new_packet[hkey] = {
+            'data': adj,
+            'meta': {
+                'ax_0': signal_packet[hkey]['meta']['ax_1'],
+                'ax_1': signal_packet[hkey]['meta']['ax_1'],
+                'time': {
+                    'label': 'Time (sec)',
+                    'index': np.float(
+                        signal_packet[hkey]['meta']['ax_0']['index'][-1])
+                }
+            }
+        }
+        if 'band' in signal_packet[hkey]['meta']:
+            new_packet[hkey]['meta']['band'] = \
+                signal_packet[hkey]['meta']['band']
+
+        return new_packet
@@ -5,23 +5,121 @@ Created by: Ankit Khambhati
 
 Change Log
 ----------
+2026/10/18 - WelchCoh and MTCoh allocate adjacency in the pipe dtype
+2026/10/18 - Condensed WelchCoh and MTCoh fill the upper triangle only
+2026/10/18 - WelchCoh and MTCoh process band-stacked signals in one call
+2026/10/18 - WelchCoh and MTCoh accumulate into buffers reused per window
+2026/10/18 - WelchCoh and MTCoh can share spectra with sibling pipes
+2026/10/18 - WelchCoh and MTCoh can yield condensed adjacency matrices
+2026/10/18 - WelchCoh can reuse segment spectra across overlapping windows
+2026/10/18 - WelchCoh and MTCoh yield one adjacency per band of a cf list
+2026/10/18 - WelchCoh builds all coherences from per-channel segment spectra
+2026/10/18 - MTCoh builds all coherences from one cross-spectral estimate
 2016/03/06 - Implemented WelchCoh and MTCoh pipes
 """
 
 from __future__ import division
 import numpy as np
-from mtspec import mt_coherence, mtspec
-from scipy.signal import coherence
+from mtspec import dpss
 import matplotlib.pyplot as plt
 
 from ..errors import check_type
 from ..base import AdjacencyPipe
+from ..sigtools import sample_frequency
+from ..spectral import (coherence_matrix, segment_spectra, SegmentCache,
+                        shared_spectrum)
+from ..graphtools import condense_signal_packet
+
+
+def _check_cf(cf):
+    """Validate cf, a [low, high] range or a list of such ranges"""
+    check_type(cf, list)
+    is_multi = (len(cf) > 0) and isinstance(cf[0], list)
+    bands = cf if is_multi else [cf]
+    if len(bands) == 0:
+        raise Exception('Must give at least one frequency range')
+    for band in bands:
+        check_type(band, list)
+        if not len(band) == 2:
+            raise Exception('Must give a frequency range in list of length 2')
+
+    return bands, is_multi
+
+
+def _band_meta(bands):
+    """Describe the band axis of a multi-band adjacency signal_packet"""
+    return {'label': 'Frequency band (Hz)',
+            'index': np.array(bands, dtype=np.float)}
+
+
+def _check_band_axis(signal_packet, is_multi):
+    """A list of cf bands cannot add a second band axis to the signal"""
+    hkey = signal_packet.keys()[0]
+    if is_multi and ('band' in signal_packet[hkey]['meta']):
+        raise ValueError('A list of cf ranges cannot be applied to a signal' +
+                         ' that already has a band axis, give a single' +
+                         ' [low, high] range')
+
+
+def _coherence_packet(pipe, signal_packet, spec, band_idx):
+    """
+    Adjacency signal_packet of the band coherences of a WelchCoh or MTCoh
+
+    Condensed pipes accumulate only the upper triangle of each matrix.
+    """
+    hkey = signal_packet.keys()[0]
+    ax_0_ix = signal_packet[hkey]['meta']['ax_0']['index']
+    n_node = spec.shape[-1]
+    lead_shape = spec.shape[:-3] + (len(band_idx),)
+    if pipe.condensed:
+        adj = coherence_matrix(spec, band_idx, pipe._buffer(
+            'adj', lead_shape + (n_node*(n_node-1)//2,)), condensed=True)
+        diag = np.zeros(lead_shape + (n_node,), dtype=adj.dtype)
+        if not pipe.is_multi_:
+            adj, diag = adj[..., 0, :], diag[..., 0, :]
+    else:
+        adj = coherence_matrix(spec, band_idx, pipe._buffer(
+            'adj', lead_shape + (n_node, n_node)))
+        diag_ix = np.arange(n_node)
+        adj[..., diag_ix, diag_ix] = 0
+        if not pipe.is_multi_:
+            adj = adj[..., 0, :, :]
+
+    new_packet = {}
+    new_packet[hkey] = {
+        'data': adj,
+        'meta': {
+            'ax_0': signal_packet[hkey]['meta']['ax_1'],
+            'ax_1': signal_packet[hkey]['meta']['ax_1'],
+            'time': {
+                'label': 'Time (sec)',
+                'index': np.float(ax_0_ix[-1])
+            }
+        }
+    }
+    if pipe.is_multi_:
+        new_packet[hkey]['meta']['band'] = _band_meta(pipe.bands_)
+    elif 'band' in signal_packet[hkey]['meta']:
+        new_packet[hkey]['meta']['band'] = \
+            signal_packet[hkey]['meta']['band']
+
+    if pipe.condensed:
+        condense_signal_packet(new_packet, diag)
+
+    return new_packet
 
 
 class WelchCoh(AdjacencyPipe):
     """
     WelchCoh pipe for spectral coherence estimation using Welch's method
 
+    Segment spectra are computed once per channel, restricted to the cf
+    band, and the coherence of every pair is formed from their
+    cross-spectral matrix, matching scipy.signal.coherence. Memory scales
+    with the size of the window plus the adjacency matrix, rather than with
+    the number of channel pairs. Signals with a leading band axis yield one
+    adjacency matrix per band, and then take a single cf range.
+
     Parameters
     ----------
         window: str
@@ -34,72 +132,95 @@ class WelchCoh(AdjacencyPipe):
             Percent overlap between segments. Recommended values of 50 pct.
 
         cf: list
-            Frequency range over which to compute coherence [-NW+C, C+NW]
+            Frequency range over which to compute coherence [-NW+C, C+NW],
+            or a list of such ranges to yield one adjacency matrix per band
+            from the same spectral estimate
+
+        cache_segments: bool
+            Reuse the segment spectra shared by overlapping windows, keyed
+            by absolute sample offset. Only valid when the value of a sample
+            does not depend on the window (e.g. no zero-phase filtering of
+            each window upstream)
+
+        share_spectra: bool
+            Share the segment spectra of each window with sibling pipes
+            linked to the same upstream pipe, see spectral.SpectralCache.
+            Cannot be combined with cache_segments
+
+        condensed: bool
+            Yield the upper triangle of the adjacency matrix, with its
+            diagonal in meta['condensed'], instead of the full matrix
     """
 
-    def __init__(self, window, secperseg, pctoverlap, cf):
+    def __init__(self, window, secperseg, pctoverlap, cf,
+                 cache_segments=False, share_spectra=False, condensed=False):
         # Standard param checks
         check_type(window, str)
         check_type(secperseg, float)
         check_type(pctoverlap, float)
-        check_type(cf, list)
-        if not len(cf) == 2:
-            raise Exception('Must give a frequency range in list of length 2')
+        check_type(cache_segments, bool)
+        check_type(share_spectra, bool)
+        check_type(condensed, bool)
+        bands, is_multi = _check_cf(cf)
         if (pctoverlap > 1) or (pctoverlap < 0):
             raise Exception('Percent overlap must be a positive fraction')
+        if cache_segments and share_spectra:
+            raise ValueError('cache_segments and share_spectra cannot be' +
+                             ' combined')
 
         # Assign to instance
         self.window = window
         self.secperseg = secperseg
         self.pctoverlap = pctoverlap
         self.cf = cf
+        self.cache_segments = cache_segments
+        self.share_spectra = share_spectra
+        self.condensed = condensed
+        self.bands_ = bands
+        self.is_multi_ = is_multi
+        self.segment_cache_ = None
 
     def _pipe_as_flow(self, signal_packet):
         # Get signal_packet details
         hkey = signal_packet.keys()[0]
         ax_0_ix = signal_packet[hkey]['meta']['ax_0']['index']
-        ax_1_ix = signal_packet[hkey]['meta']['ax_1']['index']
         signal = signal_packet[hkey]['data']
-        fs = np.int(np.mean(1./np.diff(ax_0_ix)))
-
-        # Assume undirected connectivity
-        triu_ix, triu_iy = np.triu_indices(len(ax_1_ix), k=1)
-
-        # Initialize association matrix
-        adj = np.zeros((len(ax_1_ix), len(ax_1_ix)))
+        fs = sample_frequency(ax_0_ix)
+        _check_band_axis(signal_packet, self.is_multi_)
 
         # Derive signal segmenting for coherence estimation
         nperseg = int(self.secperseg*fs)
         noverlap = int(self.secperseg*fs*self.pctoverlap)
 
-        freq, Cxy = coherence(signal[:, triu_ix],
-                              signal[:, triu_iy],
-                              fs=fs, window=self.window,
-                              nperseg=nperseg, noverlap=noverlap,
-                              axis=0)
-
-        # Find closest frequency to the desired center frequency
-        cf_idx = np.flatnonzero((freq >= self.cf[0]) &
-                                (freq <= self.cf[1]))
-
-        # Store coherence in association matrix
-        adj[triu_ix, triu_iy] = np.mean(Cxy[cf_idx, :], axis=0)
-        adj += adj.T
-
-        new_packet = {}
-        new_packet[hkey] = {
-            'data': adj,
-            'meta': {
-                'ax_0': signal_packet[hkey]['meta']['ax_1'],
-                'ax_1': signal_packet[hkey]['meta']['ax_1'],
-                'time': {
-                    'label': 'Time (sec)',
-                    'index': np.float(ax_0_ix[-1])
-                }
-            }
-        }
-
-        return new_packet
+        # Segment spectra of every channel spanning all desired bands
+        freq_range = [min([band[0] for band in self.bands_]),
+                      max([band[1] for band in self.bands_])]
+        if self.cache_segments:
+            if (self.segment_cache_ is None) or \
+               (self.segment_cache_.nperseg != nperseg) or \
+               (self.segment_cache_.noverlap != noverlap):
+                self.segment_cache_ = SegmentCache(self.window, nperseg,
+                                                   noverlap)
+            freq, spec = self.segment_cache_.segment_spectra(
+                signal, ax_0_ix, fs, freq_range)
+        elif self.share_spectra:
+            # All frequencies, so siblings with other bands can share
+            freq, spec = shared_spectrum(
+                signal_packet,
+                ('welch', fs, self.window, nperseg, noverlap),
+                lambda signal: segment_spectra(signal, fs, self.window,
+                                               nperseg, noverlap))
+            freq_idx = np.flatnonzero((freq >= freq_range[0]) &
+                                      (freq <= freq_range[1]))
+            freq, spec = freq[freq_idx], spec[..., freq_idx, :, :]
+        else:
+            freq, spec = segment_spectra(signal, fs, self.window,
+                                         nperseg, noverlap, freq_range)
+        band_idx = [np.flatnonzero((freq >= band[0]) & (freq <= band[1]))
+                    for band in self.bands_]
+
+        # Store coherence in association matrix, one per band
+        return _coherence_packet(self, signal_packet, spec, band_idx)
 
 
 class MTCoh(AdjacencyPipe):
@@ -107,6 +228,13 @@ class MTCoh(AdjacencyPipe):
     MTCoh pipe for spectral coherence estimation using
     multitaper methods
 
+    Each channel is tapered and transformed once per window, and the
+    coherence of every pair is formed from the cross-spectral matrix of the
+    tapered spectra within the cf band. Tapers are cached per window length.
+    The estimate matches mtspec.mt_coherence with constant taper weights.
+    Signals with a leading band axis yield one adjacency matrix per band,
+    and then take a single cf range.
+
     Parameters
     ----------
         time_band: float
@@ -117,69 +245,84 @@ class MTCoh(AdjacencyPipe):
             Number of Slepian sequences to use (Usually < 2*NW-1)
 
         cf: list
-            Frequency range over which to compute coherence [-NW+C, C+NW]
+            Frequency range over which to compute coherence [-NW+C, C+NW],
+            or a list of such ranges to yield one adjacency matrix per band
+            from the same spectral estimate
+
+        share_spectra: bool
+            Share the tapered spectra of each window with sibling pipes
+            linked to the same upstream pipe, see spectral.SpectralCache
+
+        condensed: bool
+            Yield the upper triangle of the adjacency matrix, with its
+            diagonal in meta['condensed'], instead of the full matrix
     """
 
-    def __init__(self, time_band, n_taper, cf):
+    def __init__(self, time_band, n_taper, cf, share_spectra=False,
+                 condensed=False):
         # Standard param checks
         check_type(time_band, float)
         check_type(n_taper, int)
-        check_type(cf, list)
+        check_type(share_spectra, bool)
+        check_type(condensed, bool)
+        bands, is_multi = _check_cf(cf)
         if n_taper >= 2*time_band:
             raise Exception('Number of tapers must be less than 2*time_band')
-        if not len(cf) == 2:
-            raise Exception('Must give a frequency range in list of length 2')
 
         # Assign instance parameters
         self.time_band = time_band
         self.n_taper = n_taper
         self.cf = cf
+        self.share_spectra = share_spectra
+        self.condensed = condensed
+        self.bands_ = bands
+        self.is_multi_ = is_multi
+
+        # DPSS tapers keyed by (n_sample, time_band, n_taper)
+        self.taper_cache_ = {}
+
+    def _get_taper(self, n_sample):
+        """Return the DPSS tapers for a window of n_sample"""
+        taper_key = (n_sample, self.time_band, self.n_taper)
+        if taper_key not in self.taper_cache_:
+            self.taper_cache_[taper_key] = dpss(n_sample, self.time_band,
+                                                self.n_taper)[0]
+
+        return self.taper_cache_[taper_key]
 
     def _pipe_as_flow(self, signal_packet):
         # Get signal_packet details
         hkey = signal_packet.keys()[0]
         ax_0_ix = signal_packet[hkey]['meta']['ax_0']['index']
-        ax_1_ix = signal_packet[hkey]['meta']['ax_1']['index']
         signal = signal_packet[hkey]['data']
-        fs = np.int(np.mean(1./np.diff(ax_0_ix)))
-
-        # Assume undirected connectivity
-        triu_ix, triu_iy = np.triu_indices(len(ax_1_ix), k=1)
-
-        # Initialize association matrix
-        adj = np.zeros((len(ax_1_ix), len(ax_1_ix)))
-
-        # Compute all coherences
-        for n1, n2 in zip(triu_ix, triu_iy):
-            out = mt_coherence(1.0/fs,
-                               signal[:, n1],
-                               signal[:, n2],
-                               self.time_band,
-                               self.n_taper,
-                               int(len(ax_0_ix)/2.), 0.95,
-                               iadapt=1,
-                               cohe=True, freq=True)
-
-            # Find closest frequency to the desired center frequency
-            #cf_idx = np.argmin(np.abs(out['freq'] - self.cf))
-            cf_idx = np.flatnonzero((out['freq'] >= self.cf[0]) &
-                                    (out['freq'] <= self.cf[1]))
-
-            # Store coherence in association matrix
-            adj[n1, n2] = np.mean(out['cohe'][cf_idx])
-        adj += adj.T
-
-        new_packet = {}
-        new_packet[hkey] = {
-            'data': adj,
-            'meta': {
-                'ax_0': signal_packet[hkey]['meta']['ax_1'],
-                'ax_1': signal_packet[hkey]['meta']['ax_1'],
-                'time': {
-                    'label': 'Time (sec)',
-                    'index': np.float(ax_0_ix[-1])
-                }
-            }
-        }
-
-        return new_packet
+        fs = sample_frequency(ax_0_ix)
+        n_sample = len(ax_0_ix)
+        _check_band_axis(signal_packet, self.is_multi_)
+
+        # Frequency bins as labelled by mt_coherence with nf = n_sample/2
+        n_freq = int(n_sample/2.)
+        freq = np.linspace(0, fs/2., n_freq)
+        band_idx = [np.flatnonzero((freq >= band[0]) & (freq <= band[1]))
+                    for band in self.bands_]
+        cf_idx = np.unique(np.concatenate(band_idx))
+        band_idx = [np.searchsorted(cf_idx, freq_idx)
+                    for freq_idx in band_idx]
+
+        # Tapered spectra of every channel, [... x n_freq x n_taper x n_node]
+        taper = self._get_taper(n_sample)
+
+        def tapered_spectra(signal):
+            signal = signal - signal.mean(axis=-2, keepdims=True)
+            return np.fft.rfft(taper[:, :, np.newaxis] *
+                               signal[..., :, np.newaxis, :], axis=-3)
+
+        if self.share_spectra:
+            spec = shared_spectrum(
+                signal_packet,
+                ('multitaper', n_sample, self.time_band, self.n_taper),
+                tapered_spectra)[..., cf_idx, :, :]
+        else:
+            spec = tapered_spectra(signal)[..., cf_idx, :, :]
+
+        # Store coherence in association matrix, one per band
+        return _coherence_packet(self, signal_packet, spec, band_idx)
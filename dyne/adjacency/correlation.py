@@ -5,26 +5,192 @@ Created by: Ankit Khambhati
 
 Change Log
 ----------
+2026/10/18 - Condensed Corr, CorrMag and XCorrMag fill the upper triangle only
+2026/10/18 - Corr and CorrMag share one Pearson implementation
+2026/10/18 - XCorrMag processes band-stacked signals in one call
+2026/10/18 - Adjacency pipes write into buffers reused across windows
+2026/10/18 - XCorrMag can share its window FFT with sibling pipes
+2026/10/18 - Adjacency pipes can yield condensed adjacency matrices
+2026/10/18 - XCorrMag allocates in the pipe dtype, running sums in double
+2026/10/18 - Corr and CorrMag take an incremental running-sum mode
+2026/10/18 - XCorrMag batches IFFTs over edge blocks and takes max_lag
+2026/10/18 - Corr and CorrMag process band-stacked signals in one call
 2016/03/18 - Changed XCorr and Corr to __Mag and implement Corr (nonmag)
 2016/03/06 - Implemented XCorr and Corr pipes
 """
 
 from __future__ import division
 import numpy as np
+from scipy.fftpack import next_fast_len
 
 from ..errors import check_type
 from ..base import AdjacencyPipe
+from ..sigtools import sample_frequency, new_sample_start
+from ..graphtools import condense_signal_packet
+from ..spectral import shared_spectrum
+
+# Memory budget of one block of rows of a condensed correlation (bytes)
+_BLOCK_BYTES = 16 * 2**20
+
+
+def _standardize(signal):
+    """Center and scale each column of signal to unit norm, in place"""
+    signal -= signal.mean(axis=-2, keepdims=True)
+    signal /= np.sqrt(np.einsum('...ij,...ij->...j', signal,
+                                signal))[..., np.newaxis, :]
+
+    return signal
+
+
+def _corrcoef(signal, out=None):
+    """
+    Pearson correlation between the columns of signal
+
+    Any leading axes (e.g. the band axis of a FilterBank signal_packet) are
+    treated as a batch, so signal of shape [... x n_sample x n_node] yields
+    correlations of shape [... x n_node x n_node]. The signal is
+    standardized in place, and the correlations are written to out if given.
+    """
+
+    signal = _standardize(signal)
+    return np.matmul(np.swapaxes(signal, -1, -2), signal, out=out)
+
+
+def _corrcoef_condensed(signal, out=None):
+    """
+    Pearson correlation between the columns of signal, as _corrcoef, but
+    yielding only the condensed upper triangle, [... x n_node(n_node-1)/2],
+    and the diagonal, [... x n_node]
+
+    Correlations are formed in blocks of rows within _BLOCK_BYTES, so the
+    full matrices are never held.
+    """
+
+    signal = _standardize(signal)
+    n_node = signal.shape[-1]
+    if out is None:
+        out = np.empty(signal.shape[:-2] + (n_node*(n_node-1)//2,),
+                       dtype=signal.dtype)
+
+    signal_t = np.swapaxes(signal, -1, -2)
+    n_row = max(1, int(_BLOCK_BYTES //
+                       (signal.itemsize * (signal.size // signal.shape[-2]))))
+    edge_ix = 0
+    for row_start in xrange(0, n_node-1, n_row):
+        row_stop = min(row_start+n_row, n_node-1)
+        corr = np.matmul(signal_t[..., row_start:row_stop, :],
+                         signal[..., row_start+1:])
+        for row in xrange(row_start, row_stop):
+            n_edge = n_node - row - 1
+            out[..., edge_ix:edge_ix+n_edge] = \
+                corr[..., row-row_start, row-row_start:]
+            edge_ix += n_edge
+
+    return out, np.einsum('...ij,...ij->...j', signal, signal)
+
+
+class _RunningCorr(object):
+    """
+    Pearson correlation of a stream of overlapping windows from running sums
+
+    The sums of x and x x^T over the window are updated with the samples
+    that arrived and departed since the previous window, so each window
+    costs O(n_new * n_node^2) instead of O(n_sample * n_node^2). Sums are
+    accumulated in double precision about the mean of the window they were
+    started from, to limit cancellation, and are recomputed exactly every
+    n_refresh windows to bound floating-point drift. The stream restarts
+    whenever a window does not continue the previous one.
+    """
+
+    def __init__(self, n_refresh):
+        self.n_refresh = n_refresh
+        self.last_time_ = None
+        self.window_ = None
+
+    def _restart(self, signal):
+        """Compute the sums exactly over a whole window"""
+        self.shift_ = signal.mean(axis=-2, keepdims=True, dtype=np.float64)
+        signal = signal - self.shift_
+        self.sum_ = signal.sum(axis=-2)
+        self.sum_sq_ = np.matmul(np.swapaxes(signal, -1, -2), signal)
+        self.n_update_ = 0
+
+    def _update(self, arrived, departed):
+        """Add the arrived samples to, and drop the departed from, the sums"""
+        arrived = arrived - self.shift_
+        departed = departed - self.shift_
+        self.sum_ += arrived.sum(axis=-2) - departed.sum(axis=-2)
+        self.sum_sq_ += np.matmul(np.swapaxes(arrived, -1, -2), arrived)
+        self.sum_sq_ -= np.matmul(np.swapaxes(departed, -1, -2), departed)
+        self.n_update_ += 1
+
+    def corrcoef_window(self, signal, time_index):
+        """Return the Pearson correlation of a window"""
+        n_sample = signal.shape[-2]
+        start_ix = new_sample_start(time_index, self.last_time_)
+        if (start_ix is None) or \
+           (self.window_.shape != signal.shape) or \
+           (self.n_update_ + 1 >= self.n_refresh):
+            self._restart(signal)
+        elif start_ix < n_sample:
+            n_new = n_sample - start_ix
+            self._update(signal[..., start_ix:, :],
+                         self.window_[..., :n_new, :])
+        self.last_time_ = time_index[-1]
+        self.window_ = signal.copy()
+
+        # Normalize the covariance by the standard deviations
+        cov = self.sum_sq_ - (self.sum_[..., :, np.newaxis] *
+                              self.sum_[..., np.newaxis, :]) / n_sample
+        std = np.sqrt(np.diagonal(cov, axis1=-2, axis2=-1))
+
+        return cov / (std[..., :, np.newaxis] * std[..., np.newaxis, :])
 
 
 class XCorrMag(AdjacencyPipe):
     """
     XCorrMag pipe for magnitude cross-correlation association between signals
 
-    This class implements an FFT-based cross-correlation.
+    This class implements an FFT-based cross-correlation. Cross-correlations
+    are inverse transformed in blocks of edges, sized to stay within a memory
+    budget, and the FFT length is padded to a fast size. When only a short
+    range of lags is needed, each lag is computed directly for all edges at
+    once as a matrix product instead. Signals with a leading band axis yield
+    one adjacency matrix per band.
+
+    Parameters
+    ----------
+        max_lag: float or None
+            Largest lag (sec) considered, None considers all lags
+
+        mem_limit: float
+            Memory budget (MB) for each block of edges
+
+        share_spectra: bool
+            Share the FFT of each window with sibling pipes linked to the
+            same upstream pipe, see spectral.SpectralCache
+
+        condensed: bool
+            Yield the upper triangle of the adjacency matrix, with its
+            diagonal in meta['condensed'], instead of the full matrix
     """
 
-    def __init__(self):
-        self = self
+    def __init__(self, max_lag=None, mem_limit=256.0, share_spectra=False,
+                 condensed=False):
+        # Standard param checks
+        if max_lag is not None:
+            check_type(max_lag, float)
+            if max_lag < 0:
+                raise ValueError('max_lag cannot be negative')
+        check_type(mem_limit, float)
+        check_type(share_spectra, bool)
+        check_type(condensed, bool)
+
+        # Assign to instance
+        self.max_lag = max_lag
+        self.mem_limit = mem_limit
+        self.share_spectra = share_spectra
+        self.condensed = condensed
 
     def _pipe_as_flow(self, signal_packet):
         # Get signal_packet details
@@ -32,28 +198,71 @@ class XCorrMag(AdjacencyPipe):
         ax_0_ix = signal_packet[hkey]['meta']['ax_0']['index']
         ax_1_ix = signal_packet[hkey]['meta']['ax_1']['index']
         signal = signal_packet[hkey]['data']
+        n_sample = len(ax_0_ix)
+        n_batch = int(np.prod(signal.shape[:-2]))
 
         # Assume undirected connectivity
-        triu_ix, triu_iy = np.triu_indices(len(ax_1_ix), k=1)
-
-        # Normalize the signal
-        signal -= signal.mean(axis=0)
-        signal /= signal.std(axis=0)
-
-        # Initialize adjacency matrix
-        adj = np.zeros((len(ax_1_ix), len(ax_1_ix)))
-
-        # Use FFT to compute cross-correlation
-        signal_fft = np.fft.rfft(
-            np.vstack((signal, np.zeros_like(signal))),
-            axis=0)
-
-        # Iterate over all edges
-        for n1, n2 in zip(triu_ix, triu_iy):
-            xc = 1 / len(ax_0_ix) * np.fft.irfft(
-                signal_fft[:, n1] * np.conj(signal_fft[:, n2]))
-            adj[n1, n2] = np.max(np.abs(xc))
-        adj += adj.T
+        n_node = len(ax_1_ix)
+        triu_ix, triu_iy = np.triu_indices(n_node, k=1)
+
+        # Normalize the signal, leaving the window intact for siblings
+        signal = signal - signal.mean(axis=-2, keepdims=True)
+        signal /= signal.std(axis=-2, keepdims=True)
+
+        # Lags needed, cross-correlation is linear in 2*n_sample-1 lags
+        n_fft = next_fast_len(2*n_sample - 1)
+        if self.max_lag is None:
+            n_lag = n_sample - 1
+        else:
+            n_lag = min(int(np.round(self.max_lag *
+                                     sample_frequency(ax_0_ix))),
+                        n_sample - 1)
+
+        # Upper triangle of the adjacency, reusing the buffer of the last
+        # window
+        edge = self._buffer('edge', signal.shape[:-2] + (len(triu_ix),))
+
+        if 2*n_lag + 1 <= np.log2(n_fft):
+            # Few lags, one matrix product per lag covers every edge
+            signal_t = np.swapaxes(signal, -1, -2)
+            xc_max = np.abs(np.matmul(signal_t, signal))
+            for lag in xrange(1, n_lag+1):
+                xc = np.abs(np.matmul(signal_t[..., lag:],
+                                      signal[..., :-lag, :]))
+                np.maximum(xc_max, xc, out=xc_max)
+                np.maximum(xc_max, np.swapaxes(xc, -1, -2), out=xc_max)
+            edge[...] = xc_max[..., triu_ix, triu_iy] / n_sample
+        else:
+            # Use FFT to compute cross-correlation
+            if self.share_spectra:
+                signal_fft = shared_spectrum(
+                    signal_packet, ('xcorr', n_fft),
+                    lambda _: np.fft.rfft(signal, n=n_fft, axis=-2))
+            else:
+                signal_fft = np.fft.rfft(signal, n=n_fft, axis=-2)
+            lag_ix = np.r_[0:n_lag+1, n_fft-n_lag:n_fft]
+
+            # Iterate over blocks of edges within the memory budget
+            n_block = max(1, int(self.mem_limit * 2**20 //
+                                 (16 * n_fft * n_batch)))
+            for blk in xrange(0, len(triu_ix), n_block):
+                blk_ix = triu_ix[blk:blk+n_block]
+                blk_iy = triu_iy[blk:blk+n_block]
+                xc = np.fft.irfft(
+                    signal_fft[..., blk_ix] *
+                    np.conj(signal_fft[..., blk_iy]), n=n_fft, axis=-2)
+                edge[..., blk:blk+n_block] = np.max(
+                    np.abs(xc[..., lag_ix, :]), axis=-2) / n_sample
+
+        # The diagonal is left at 0
+        diag = np.zeros(signal.shape[:-2] + (n_node,), dtype=edge.dtype)
+        if self.condensed:
+            adj = edge
+        else:
+            adj = self._buffer('adj', signal.shape[:-2] + (n_node, n_node))
+            adj[..., triu_ix, triu_iy] = edge
+            adj[..., triu_iy, triu_ix] = edge
+            adj[..., np.arange(n_node), np.arange(n_node)] = diag
 
         new_packet = {}
         new_packet[hkey] = {
@@ -67,27 +276,70 @@ class XCorrMag(AdjacencyPipe):
                 }
             }
         }
+        if 'band' in signal_packet[hkey]['meta']:
+            new_packet[hkey]['meta']['band'] = \
+                signal_packet[hkey]['meta']['band']
+
+        if self.condensed:
+            condense_signal_packet(new_packet, diag)
 
         return new_packet
 
 
-class CorrMag(AdjacencyPipe):
+class _PearsonCorr(AdjacencyPipe):
     """
-    CorrMag pipe for magnitude Pearson correlation association between signals
-
-    This class implements a standard Pearson correlation measure.
+    Pearson correlation shared by Corr and CorrMag, which yields the
+    magnitude of the correlation when magnitude is set
     """
 
-    def __init__(self):
-        self = self
+    magnitude = False
+
+    def __init__(self, incremental=False, n_refresh=100, condensed=False):
+        # Standard param checks
+        check_type(incremental, bool)
+        check_type(n_refresh, int)
+        check_type(condensed, bool)
+        if n_refresh < 1:
+            raise ValueError('n_refresh must be at least 1')
+
+        # Assign to instance
+        self.incremental = incremental
+        self.n_refresh = n_refresh
+        self.condensed = condensed
+        self.running_ = None
+
+    def _corrcoef(self, signal_packet):
+        """
+        Pearson correlation of the signal_packet window, and its diagonal
+        when only the condensed upper triangle was formed (else None)
+        """
+        hkey = signal_packet.keys()[0]
+        signal = signal_packet[hkey]['data']
+        n_node = signal.shape[-1]
+        if not self.incremental:
+            if self.condensed:
+                return _corrcoef_condensed(signal, self._buffer(
+                    'adj', signal.shape[:-2] + (n_node*(n_node-1)//2,),
+                    signal.dtype))
+            return _corrcoef(signal, self._buffer(
+                'adj', signal.shape[:-2] + (n_node, n_node),
+                signal.dtype)), None
+
+        if self.running_ is None:
+            self.running_ = _RunningCorr(self.n_refresh)
+        return self.running_.corrcoef_window(
+            signal, signal_packet[hkey]['meta']['ax_0']['index']), None
 
     def _pipe_as_flow(self, signal_packet):
         # Get signal_packet details
         hkey = signal_packet.keys()[0]
-        signal = signal_packet[hkey]['data']
 
         # Apply Pearson correlation
-        adj = np.abs(np.corrcoef(signal.T))
+        adj, diag = self._corrcoef(signal_packet)
+        if self.magnitude:
+            np.abs(adj, out=adj)
+            if diag is not None:
+                np.abs(diag, out=diag)
 
         new_packet = {}
         new_packet[hkey] = {
@@ -102,40 +354,69 @@ class CorrMag(AdjacencyPipe):
                 }
             }
         }
+        if 'band' in signal_packet[hkey]['meta']:
+            new_packet[hkey]['meta']['band'] = \
+                signal_packet[hkey]['meta']['band']
+
+        if self.condensed:
+            condense_signal_packet(new_packet, diag)
 
         return new_packet
 
 
-class Corr(AdjacencyPipe):
+class CorrMag(_PearsonCorr):
     """
-    Corr pipe for Pearson correlation association between signals
+    CorrMag pipe for magnitude Pearson correlation association between signals
+
+    This class implements a standard Pearson correlation measure. Signals
+    with a leading band axis yield one adjacency matrix per band.
+
+    In incremental mode the correlation of overlapping windows is updated
+    from running sums of the signal, at a cost proportional to the window
+    displacement rather than the window length.
 
-    This class implements a standard Pearson correlation measure.
+    Parameters
+    ----------
+        incremental: bool
+            Update running sums across consecutive windows instead of
+            recomputing each window from scratch
+
+        n_refresh: int
+            Number of windows between exact recomputations of the running
+            sums in incremental mode
+
+        condensed: bool
+            Yield the upper triangle of the adjacency matrix, with its
+            diagonal in meta['condensed'], instead of the full matrix
     """
 
-    def __init__(self):
-        self = self
+    magnitude = True
 
-    def _pipe_as_flow(self, signal_packet):
-        # Get signal_packet details
-        hkey = signal_packet.keys()[0]
-        signal = signal_packet[hkey]['data']
 
-        # Apply Pearson correlation
-        adj = np.corrcoef(signal.T)
+class Corr(_PearsonCorr):
+    """
+    Corr pipe for Pearson correlation association between signals
 
-        new_packet = {}
-        new_packet[hkey] = {
-            'data': adj,
-            'meta': {
-                'ax_0': signal_packet[hkey]['meta']['ax_1'],
-                'ax_1': signal_packet[hkey]['meta']['ax_1'],
-                'time': {
-                    'label': 'Time (sec)',
-                    'index': np.float(
-                        signal_packet[hkey]['meta']['ax_0']['index'][-1])
-                }
-            }
-        }
+    This class implements a standard Pearson correlation measure. Signals
+    with a leading band axis yield one adjacency matrix per band.
 
-        return new_packet
+    In incremental mode the correlation of overlapping windows is updated
+    from running sums of the signal, at a cost proportional to the window
+    displacement rather than the window length.
+
+    Parameters
+    ----------
+        incremental: bool
+            Update running sums across consecutive windows instead of
+            recomputing each window from scratch
+
+        n_refresh: int
+            Number of windows between exact recomputations of the running
+            sums in incremental mode
+
+        condensed: bool
+            Yield the upper triangle of the adjacency matrix, with its
+            diagonal in meta['condensed'], instead of the full matrix
+    """
+
+    magnitude = False
@@ -0,0 +1,297 @@
+"""
+Phase-synchrony pipes for quantifying signal similarity (i.e. connectivity)
+
+Created by: Ankit Khambhati
+
+Change Log
+----------
+2026/10/18 - Condensed PLI fills the upper triangle only
+2026/10/18 - PLI and WPLI fill buffers reused across windows
+2026/10/18 - Phase pipes can share the analytic signal with sibling pipes
+2026/10/18 - Implemented PLV, PLI, WPLI and ImCoh pipes
+"""
+
+from __future__ import division
+import numpy as np
+
+from ..errors import check_type
+from ..base import AdjacencyPipe
+from ..spectral import analytic_signal, shared_spectrum
+from ..graphtools import condense_signal_packet
+
+
+def _analytic(signal_packet, share_spectra):
+    """Analytic signal of a real signal, complex signals are passed through"""
+    hkey = signal_packet.keys()[0]
+    signal = signal_packet[hkey]['data']
+    if np.iscomplexobj(signal):
+        return signal
+
+    def transform(signal):
+        return analytic_signal(signal - signal.mean(axis=-2, keepdims=True))
+
+    if share_spectra:
+        return shared_spectrum(signal_packet, ('analytic',), transform)
+    return transform(signal)
+
+
+def _cross_product(signal):
+    """Sum over samples of signal_x * conj(signal_y), for all pairs"""
+    return np.matmul(np.swapaxes(signal, -1, -2), np.conj(signal))
+
+
+def _edge_blocks(signal):
+    """
+    Yield the imaginary part of signal_x * conj(signal_y) for the edges of
+    one node at a time, (node_x, node_y > node_x), shape [... x n_y x n_sample]
+
+    Channels are laid out node-major so each block is a contiguous slice,
+    and only one block of at most n_node x n_sample values is live at once.
+    """
+    real = np.ascontiguousarray(np.swapaxes(signal.real, -1, -2))
+    imag = np.ascontiguousarray(np.swapaxes(signal.imag, -1, -2))
+
+    for node_x in xrange(signal.shape[-1] - 1):
+        cross_imag = imag[..., node_x:node_x+1, :] * real[..., node_x+1:, :]
+        cross_imag -= real[..., node_x:node_x+1, :] * imag[..., node_x+1:, :]
+        yield node_x, cross_imag
+
+
+def _symmetric_adjacency(adj, blk_values):
+    """Fill symmetric adjacency matrices from blocks of node edges"""
+    diag_ix = np.arange(adj.shape[-1])
+    adj[..., diag_ix, diag_ix] = 0
+    for node_x, value in blk_values:
+        adj[..., node_x, node_x+1:] = value
+        adj[..., node_x+1:, node_x] = value
+
+    return adj
+
+
+def _condensed_adjacency(edge, blk_values):
+    """Fill condensed adjacency matrices from blocks of node edges"""
+    edge_ix = 0
+    for node_x, value in blk_values:
+        edge[..., edge_ix:edge_ix+value.shape[-1]] = value
+        edge_ix += value.shape[-1]
+
+    return edge
+
+
+def _adjacency_packet(signal_packet, adj, condensed, diag=None):
+    """
+    Format adjacency matrices as an adjacency signal_packet, adj already
+    holds the condensed edges when their diagonal is given
+    """
+    hkey = signal_packet.keys()[0]
+
+    new_packet = {}
+    new_packet[hkey] = {
+        'data': adj,
+        'meta': {
+            'ax_0': signal_packet[hkey]['meta']['ax_1'],
+            'ax_1': signal_packet[hkey]['meta']['ax_1'],
+            'time': {
+                'label': 'Time (sec)',
+                'index': np.float(
+                    signal_packet[hkey]['meta']['ax_0']['index'][-1])
+            }
+        }
+    }
+    if 'band' in signal_packet[hkey]['meta']:
+        new_packet[hkey]['meta']['band'] = \
+            signal_packet[hkey]['meta']['band']
+    if condensed:
+        condense_signal_packet(new_packet, diag)
+
+    return new_packet
+
+
+class PLV(AdjacencyPipe):
+    """
+    PLV pipe for phase-locking value between signals
+
+    Instantaneous phases are taken from the analytic signal of each channel,
+    computed once per window (complex signals, e.g. from AnalyticSignal, are
+    used as given). The phase-locking value of every pair is then one matrix
+    product of unit phasors. Signals with a leading band axis yield one
+    adjacency matrix per band.
+
+    Parameters
+    ----------
+        share_spectra: bool
+            Share the analytic signal of each window with sibling pipes
+            linked to the same upstream pipe, see spectral.SpectralCache
+
+        condensed: bool
+            Yield the upper triangle of the adjacency matrix, with its
+            diagonal in meta['condensed'], instead of the full matrix
+    """
+
+    def __init__(self, share_spectra=False, condensed=False):
+        # Standard param checks
+        check_type(share_spectra, bool)
+        check_type(condensed, bool)
+
+        # Assign to instance
+        self.share_spectra = share_spectra
+        self.condensed = condensed
+
+    def _pipe_as_flow(self, signal_packet):
+        # Get signal_packet details
+        signal = _analytic(signal_packet, self.share_spectra)
+
+        # Unit phasors, |mean(exp(i(phi_x - phi_y)))|
+        phasor = signal / np.abs(signal)
+        adj = np.abs(_cross_product(phasor)) / signal.shape[-2]
+
+        diag_ix = np.arange(adj.shape[-1])
+        adj[..., diag_ix, diag_ix] = 0
+
+        return _adjacency_packet(signal_packet, adj, self.condensed)
+
+
+class ImCoh(AdjacencyPipe):
+    """
+    ImCoh pipe for imaginary coherency between signals
+
+    The coherency of every pair is formed from one matrix product of the
+    analytic signals of the window (complex signals are used as given), and
+    its imaginary part, insensitive to zero-lag volume conduction, is kept.
+    Signals with a leading band axis yield one adjacency matrix per band.
+
+    Parameters
+    ----------
+        share_spectra: bool
+            Share the analytic signal of each window with sibling pipes
+            linked to the same upstream pipe, see spectral.SpectralCache
+
+        condensed: bool
+            Yield the upper triangle of the adjacency matrix, with its
+            diagonal in meta['condensed'], instead of the full matrix
+    """
+
+    def __init__(self, share_spectra=False, condensed=False):
+        # Standard param checks
+        check_type(share_spectra, bool)
+        check_type(condensed, bool)
+
+        # Assign to instance
+        self.share_spectra = share_spectra
+        self.condensed = condensed
+
+    def _pipe_as_flow(self, signal_packet):
+        # Get signal_packet details
+        signal = _analytic(signal_packet, self.share_spectra)
+
+        # Normalize the cross-spectrum by the auto-spectra
+        cross = _cross_product(signal)
+        power = np.real(np.diagonal(cross, axis1=-2, axis2=-1))
+        norm = np.sqrt(power[..., :, np.newaxis] * power[..., np.newaxis, :])
+        adj = np.abs(np.imag(cross)) / norm
+
+        diag_ix = np.arange(adj.shape[-1])
+        adj[..., diag_ix, diag_ix] = 0
+
+        return _adjacency_packet(signal_packet, adj, self.condensed)
+
+
+class PLI(AdjacencyPipe):
+    """
+    PLI pipe for phase-lag index between signals
+
+    The analytic signal of each channel is computed once per window (complex
+    signals are used as given). The sign of the phase lag is taken for the
+    edges of one node at a time, so memory stays at O(n_node * n_sample).
+    Signals with a leading band axis yield one adjacency matrix per band.
+
+    Parameters
+    ----------
+        share_spectra: bool
+            Share the analytic signal of each window with sibling pipes
+            linked to the same upstream pipe, see spectral.SpectralCache
+
+        condensed: bool
+            Yield the upper triangle of the adjacency matrix, with its
+            diagonal in meta['condensed'], instead of the full matrix
+    """
+
+    def __init__(self, share_spectra=False, condensed=False):
+        # Standard param checks
+        check_type(share_spectra, bool)
+        check_type(condensed, bool)
+
+        # Assign to instance
+        self.share_spectra = share_spectra
+        self.condensed = condensed
+
+    def _pipe_as_flow(self, signal_packet):
+        # Get signal_packet details
+        signal = _analytic(signal_packet, self.share_spectra)
+        n_node = signal.shape[-1]
+
+        # |mean(sign(sin(phi_x - phi_y)))|, sign of the imaginary cross term
+        blk_values = ((node_x, np.abs(np.mean(np.sign(cross_imag), axis=-1)))
+                      for node_x, cross_imag in _edge_blocks(signal))
+        if self.condensed:
+            adj = _condensed_adjacency(
+                self._buffer('adj', signal.shape[:-2] +
+                             (n_node*(n_node-1)//2,)), blk_values)
+            return _adjacency_packet(
+                signal_packet, adj, True,
+                np.zeros(signal.shape[:-2] + (n_node,), dtype=adj.dtype))
+
+        adj = _symmetric_adjacency(
+            self._buffer('adj', signal.shape[:-2] + (n_node, n_node)),
+            blk_values)
+
+        return _adjacency_packet(signal_packet, adj, False)
+
+
+class WPLI(AdjacencyPipe):
+    """
+    WPLI pipe for weighted phase-lag index between signals
+
+    The analytic signal of each channel is computed once per window (complex
+    signals are used as given). The numerator |mean(Im(x y*))| of every pair
+    is one matrix product. The denominator mean(|Im(x y*)|) is taken for the
+    edges of one node at a time, so memory stays at O(n_node * n_sample).
+    Signals with a leading band axis yield one adjacency matrix per band.
+
+    Parameters
+    ----------
+        share_spectra: bool
+            Share the analytic signal of each window with sibling pipes
+            linked to the same upstream pipe, see spectral.SpectralCache
+
+        condensed: bool
+            Yield the upper triangle of the adjacency matrix, with its
+            diagonal in meta['condensed'], instead of the full matrix
+    """
+
+    def __init__(self, share_spectra=False, condensed=False):
+        # Standard param checks
+        check_type(share_spectra, bool)
+        check_type(condensed, bool)
+
+        # Assign to instance
+        self.share_spectra = share_spectra
+        self.condensed = condensed
+
+    def _pipe_as_flow(self, signal_packet):
+        # Get signal_packet details
+        signal = _analytic(signal_packet, self.share_spectra)
+        n_node = signal.shape[-1]
+
+        numer = np.abs(np.imag(_cross_product(signal)))
+        denom = _symmetric_adjacency(
+            self._buffer('denom', signal.shape[:-2] + (n_node, n_node),
+                         np.float64),
+            ((node_x, np.sum(np.abs(cross_imag), axis=-1))
+             for node_x, cross_imag in _edge_blocks(signal)))
+
+        # Pairs without any phase lag have no defined wPLI, report 0
+        denom[denom == 0] = np.inf
+        adj = np.divide(numer, denom, out=numer)
+
+        return _adjacency_packet(signal_packet, adj, self.condensed)
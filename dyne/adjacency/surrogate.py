@@ -0,0 +1,342 @@
+"""
+Surrogate pipes for testing the significance of signal similarity
+
+Created by: Ankit Khambhati
+
+Change Log
+----------
+2026/10/18 - Surrogate p-values are two-sided unless tail is 'greater'
+2026/10/18 - Surrogate keeps one worker pool, each worker builds the pipe once
+2026/10/18 - Surrogate copies the null out of buffers of the wrapped pipe
+2026/10/18 - Implemented Surrogate pipe
+"""
+
+from __future__ import division
+import numpy as np
+import importlib
+import multiprocessing
+
+from ..errors import check_type
+from ..base import AdjacencyPipe
+
+# Memory budget of one batch of surrogate signals (bytes)
+_BATCH_BYTES = 64 * 2**20
+
+# Wrapped pipe of a worker process, built once by _init_worker
+_WORKER_PIPE = None
+
+
+def _make_pipe(pipe_module, pipe_class, pipe_param, dtype):
+    """Instantiate the wrapped AdjacencyPipe, as the Pipeline would"""
+    cls = getattr(importlib.import_module(pipe_module), pipe_class)
+    if not issubclass(cls, AdjacencyPipe):
+        raise TypeError('%s.%s is not an AdjacencyPipe' %
+                        (pipe_module, pipe_class))
+    pipe = cls(**pipe_param)
+    pipe.set_dtype(dtype)
+
+    return pipe
+
+
+def phase_randomize(signal, n_surrogate, rng):
+    """
+    Phase-randomised surrogates of each channel
+
+    Every channel keeps its amplitude spectrum and gets independent uniform
+    random phases, destroying the coupling between channels. All surrogates
+    are formed by one batched inverse FFT.
+
+    Parameters
+    ----------
+        signal: numpy.ndarray, shape: [... x n_sample x n_node]
+            Windowed signal, any leading axes (e.g. bands) are batched
+
+        n_surrogate: int
+            Number of surrogates
+
+        rng: numpy.random.RandomState
+            Random number generator
+
+    Returns
+    -------
+        surrogate: numpy.ndarray, shape: [n_surrogate x ... x n_sample x
+                                          n_node]
+    """
+
+    n_sample = signal.shape[-2]
+    spec = np.fft.rfft(signal, axis=-2)
+
+    phase = rng.uniform(0, 2*np.pi, (n_surrogate,) + spec.shape)
+    phase[..., 0, :] = 0
+    if n_sample % 2 == 0:
+        phase[..., -1, :] = 0
+
+    return np.fft.irfft(spec * np.exp(1j*phase), n=n_sample, axis=-2)
+
+
+def time_shift(signal, n_surrogate, rng):
+    """
+    Time-shifted surrogates of each channel
+
+    Every channel is circularly shifted by an independent random number of
+    samples (at least one), shared by any leading axes.
+
+    Parameters
+    ----------
+        signal: numpy.ndarray, shape: [... x n_sample x n_node]
+            Windowed signal, any leading axes (e.g. bands) are batched
+
+        n_surrogate: int
+            Number of surrogates
+
+        rng: numpy.random.RandomState
+            Random number generator
+
+    Returns
+    -------
+        surrogate: numpy.ndarray, shape: [n_surrogate x ... x n_sample x
+                                          n_node]
+    """
+
+    n_sample, n_node = signal.shape[-2:]
+    shift = rng.randint(1, n_sample, (n_surrogate, n_node))
+    sample_ix = (np.arange(n_sample)[np.newaxis, :, np.newaxis] +
+                 shift[:, np.newaxis, :]) % n_sample
+
+    surrogate = signal[..., sample_ix, np.arange(n_node)]
+    return np.rollaxis(surrogate, signal.ndim-2, 0)
+
+
+def _init_worker(pipe_def, dtype):
+    """Build the wrapped pipe once in a new worker process"""
+    global _WORKER_PIPE
+    _WORKER_PIPE = _make_pipe(*(pipe_def + (dtype,)))
+
+
+def _null_adjacency(task):
+    """Adjacency of each surrogate signal, run in a worker process"""
+    hkey, meta, surrogate = task
+
+    return _apply_pipe(_WORKER_PIPE, hkey, meta, surrogate)
+
+
+def _apply_pipe(pipe, hkey, meta, surrogate):
+    """
+    Stack the adjacency data the pipe yields for each surrogate signal,
+    along with the diagonal of condensed adjacency data (else None)
+    """
+    null, null_diag = [], []
+    for surr in surrogate:
+        null_packet = pipe._pipe_as_flow({hkey: {'data': surr, 'meta': meta}})
+        null_hkey = null_packet.keys()[0]
+        # Copy, the pipe may yield the same buffer for every surrogate
+        null.append(np.array(null_packet[null_hkey]['data']))
+        if 'condensed' in null_packet[null_hkey]['meta']:
+            null_diag.append(np.array(
+                null_packet[null_hkey]['meta']['condensed']['index']))
+
+    return np.array(null), (np.array(null_diag) if null_diag else None)
+
+
+def _concatenate(null_list):
+    """Concatenate the (data, diagonal) null distributions of each batch"""
+    null = np.concatenate([null for null, _ in null_list])
+    if null_list[0][1] is None:
+        return null, None
+
+    return null, np.concatenate([null_diag for _, null_diag in null_list])
+
+
+class Surrogate(AdjacencyPipe):
+    """
+    Surrogate pipe for the significance of an adjacency against a null
+    distribution of surrogate signals
+
+    The wrapped AdjacencyPipe, given as it would be in the pipe definitions,
+    is applied to the window and to n_surrogate surrogates of the window
+    that keep the spectrum of each channel but destroy the coupling between
+    channels. Surrogates are generated in batched FFTs (or index gathers),
+    and their adjacency may be evaluated across a process pool. Each
+    element of the adjacency (including a condensed diagonal) is reported
+    as a p-value or a z-score against its null distribution.
+
+    Surrogates are drawn from a generator seeded once, so a run over the
+    same windows is reproducible regardless of n_process. The wrapped pipe
+    must treat every window independently; running-sum, segment-cache and
+    shared-spectra modes are rejected.
+
+    Parameters
+    ----------
+        pipe_module: str
+            Module of the wrapped AdjacencyPipe,
+            e.g. 'dyne.adjacency.coherence'
+
+        pipe_class: str
+            Class of the wrapped AdjacencyPipe, e.g. 'WelchCoh'
+
+        pipe_param: dict
+            Parameters of the wrapped AdjacencyPipe
+
+        n_surrogate: int
+            Number of surrogates in the null distribution
+
+        method: str
+            Surrogate generation, 'phase' (phase randomisation) or 'shift'
+            (random circular time shift of each channel)
+
+        stat: str
+            Statistic to yield, 'pvalue' ((1 + #null at least as extreme as
+            observed) / (n_surrogate + 1)) or 'zscore' (standardised by the
+            null mean and standard deviation, 0 where the null is constant)
+
+        tail: str
+            Extremes counted by a p-value, 'two-sided' (|null| >=
+            |observed|, for signed adjacency such as Corr) or 'greater'
+            (null >= observed), both agree on non-negative adjacency
+
+        seed: int
+            Seed of the surrogate random number generator
+
+        n_process: int
+            Number of worker processes evaluating surrogates, 1 runs them in
+            this process. The workers are started with the first window,
+            build the wrapped pipe once and are kept until the flow closes
+    """
+
+    def __init__(self, pipe_module, pipe_class, pipe_param, n_surrogate,
+                 method='phase', stat='zscore', tail='two-sided', seed=0,
+                 n_process=1):
+        # Standard param checks
+        check_type(pipe_module, str)
+        check_type(pipe_class, str)
+        check_type(pipe_param, dict)
+        check_type(n_surrogate, int)
+        check_type(method, str)
+        check_type(stat, str)
+        check_type(tail, str)
+        check_type(seed, int)
+        check_type(n_process, int)
+        if n_surrogate < 2:
+            raise ValueError('Must use at least two surrogates')
+        if method not in ['phase', 'shift']:
+            raise ValueError('%r is not a supported surrogate method' %
+                             method)
+        if stat not in ['pvalue', 'zscore']:
+            raise ValueError('%r is not a supported statistic' % stat)
+        if tail not in ['two-sided', 'greater']:
+            raise ValueError('%r is not a supported tail' % tail)
+        if n_process < 1:
+            raise ValueError('n_process must be at least 1')
+        for param in ['incremental', 'cache_segments', 'share_spectra']:
+            if pipe_param.get(param, False):
+                raise ValueError('Surrogates require the wrapped pipe to' +
+                                 ' treat windows independently, %r must' %
+                                 param + ' be False')
+
+        # Assign to instance
+        self.pipe_module = pipe_module
+        self.pipe_class = pipe_class
+        self.pipe_param = pipe_param
+        self.n_surrogate = n_surrogate
+        self.method = method
+        self.stat = stat
+        self.tail = tail
+        self.seed = seed
+        self.n_process = n_process
+        self.pipe_ = _make_pipe(pipe_module, pipe_class, pipe_param,
+                                self.dtype_)
+        self.rng_ = np.random.RandomState(seed)
+        self.pool_ = None
+
+    def set_dtype(self, dtype):
+        super(Surrogate, self).set_dtype(dtype)
+        self.pipe_.set_dtype(dtype)
+        # Workers rebuild the wrapped pipe in the new dtype
+        self._close_flow()
+
+    def _get_pool(self):
+        """Start the worker pool on first use"""
+        if self.pool_ is None:
+            pipe_def = (self.pipe_module, self.pipe_class, self.pipe_param)
+            self.pool_ = multiprocessing.Pool(
+                self.n_process, initializer=_init_worker,
+                initargs=(pipe_def, self.dtype_))
+
+        return self.pool_
+
+    def _close_flow(self):
+        if self.pool_ is not None:
+            self.pool_.close()
+            self.pool_.join()
+            self.pool_ = None
+
+    def _surrogate_batches(self, signal):
+        """Generate the surrogates in batches bounded by memory"""
+        surrogate_fn = phase_randomize if self.method == 'phase' \
+            else time_shift
+        n_batch = max(1, int(_BATCH_BYTES // (16*signal.size)))
+
+        for batch_start in xrange(0, self.n_surrogate, n_batch):
+            yield surrogate_fn(
+                signal, min(n_batch, self.n_surrogate-batch_start), self.rng_)
+
+    def _null_distribution(self, signal_packet):
+        """Adjacency data (and condensed diagonal) of every surrogate"""
+        hkey = signal_packet.keys()[0]
+        signal = signal_packet[hkey]['data']
+        meta = signal_packet[hkey]['meta']
+
+        if self.n_process == 1:
+            return _concatenate(
+                [_apply_pipe(self.pipe_, hkey, meta, surrogate)
+                 for surrogate in self._surrogate_batches(signal)])
+
+        # Split every batch across the workers, sending only the surrogates
+        pool = self._get_pool()
+        null = []
+        for surrogate in self._surrogate_batches(signal):
+            null.extend(pool.map(
+                _null_adjacency,
+                [(hkey, meta, surrogate_split)
+                 for surrogate_split in np.array_split(
+                     surrogate, min(self.n_process, len(surrogate)))]))
+
+        return _concatenate(null)
+
+    def _statistic(self, observed, null):
+        """Significance of the observed values against the null"""
+        if self.stat == 'pvalue':
+            if self.tail == 'two-sided':
+                observed, null = np.abs(observed), np.abs(null)
+            # Ties up to rounding count as at least as extreme
+            tie = 1e-10*np.abs(observed)
+            return (1 + np.sum(null >= observed - tie, axis=0)) / \
+                (self.n_surrogate + 1)
+
+        # A null constant up to rounding (e.g. a diagonal of ones) scores 0
+        null_mean = np.mean(null, axis=0)
+        null_std = np.std(null, axis=0)
+        null_std[null_std <= 1e-10*np.abs(null_mean)] = np.inf
+        null_std[null_std == 0] = np.inf
+        return (observed - null_mean) / null_std
+
+    def _pipe_as_flow(self, signal_packet):
+        # Null before observed adjacency, the wrapped pipe may modify the
+        # window in place and reuse its output buffers
+        null, null_diag = self._null_distribution(signal_packet)
+
+        # A gated window is passed on as is
+        new_packet = self.pipe_._pipe_as_flow(signal_packet)
+        if not new_packet:
+            return new_packet
+        new_hkey = new_packet.keys()[0]
+
+        # Score every element, including a condensed diagonal
+        new_packet[new_hkey]['data'] = self._statistic(
+            new_packet[new_hkey]['data'], null)
+        if null_diag is not None:
+            diag_meta = new_packet[new_hkey]['meta']['condensed']
+            diag_meta['index'] = self._statistic(diag_meta['index'],
+                                                 null_diag)
+
+        return new_packet
@@ -0,0 +1,144 @@
+"""
+Pruning pipes for keeping only the strongest edges of the network
+
+Created by: Ankit Khambhati
+
+Change Log
+----------
+2026/10/18 - Implemented PruneEdges pipe
+"""
+
+from __future__ import division
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import minimum_spanning_tree
+
+from ..errors import check_type
+from ..base import AdjProcPipe
+from ..graphtools import adjacency
+
+
+class PruneEdges(AdjProcPipe):
+    """
+    PruneEdges pipe for pruning an adjacency matrix to a sparse network
+
+    Edges are ranked by the magnitude of their weight and the kept edges
+    retain their signed weight. Self-loops are discarded. Symmetric
+    adjacency matrices are pruned per undirected edge, so the pruned matrix
+    stays symmetric. The pruned network is yielded as a
+    scipy.sparse.csr_matrix, which the topology pipes solve with sparse
+    kernels.
+
+    Parameters
+    ----------
+        method: str
+            Pruning method, one of:
+                'absolute' - keep edges with magnitude of at least value
+                'proportional' - keep the value fraction (0 < x <= 1) of
+                    strongest edges
+                'topk' - keep the value strongest edges of every node
+                'mst' - keep the maximum spanning tree as a backbone, plus
+                    the value fraction (0 <= x <= 1) of strongest edges
+
+        value: float or int
+            Threshold of the pruning method (int for 'topk', float otherwise)
+    """
+
+    def __init__(self, method, value):
+        # Standard param checks
+        check_type(method, str)
+        if method not in ['absolute', 'proportional', 'topk', 'mst']:
+            raise ValueError('%r is not a supported pruning method' % method)
+        if method == 'topk':
+            check_type(value, int)
+            if value < 1:
+                raise ValueError('topk must keep at least one edge per node')
+        else:
+            check_type(value, float)
+        if method == 'proportional' and not (0 < value <= 1):
+            raise ValueError('proportional value must be within (0, 1]')
+        if method == 'mst' and not (0 <= value <= 1):
+            raise ValueError('mst value must be within [0, 1]')
+
+        # Assign to instance
+        self.method = method
+        self.value = value
+
+    def _strongest(self, weight, fraction):
+        """Mask of the fraction of edges with the largest weight"""
+        n_keep = int(np.round(fraction * len(weight)))
+        keep = np.zeros(len(weight), dtype=bool)
+        if n_keep > 0:
+            keep[np.argpartition(-weight, n_keep-1)[:n_keep]] = True
+
+        return keep
+
+    def _pipe_as_flow(self, signal_packet):
+        # Get signal_packet details
+        hkey = signal_packet.keys()[0]
+        adj = adjacency(signal_packet)
+        if not adj.ndim == 2:
+            raise ValueError('PruneEdges takes one adjacency matrix per' +
+                             ' signal_packet, not a band stack')
+        n_node = adj.shape[0]
+
+        # Candidate edges, once per node pair when undirected
+        is_symmetric = np.allclose(adj, adj.T)
+        if is_symmetric:
+            edge_ix, edge_iy = np.triu_indices(n_node, k=1)
+        else:
+            edge_ix, edge_iy = np.nonzero(~np.eye(n_node, dtype=bool))
+        weight = np.abs(adj[edge_ix, edge_iy])
+
+        if self.method == 'absolute':
+            keep = weight >= self.value
+
+        elif self.method == 'proportional':
+            keep = self._strongest(weight, self.value)
+
+        elif self.method == 'topk':
+            # Rank the edges of every node, excluding self-loops
+            node_weight = np.abs(adj)
+            node_weight[np.diag_indices(n_node)] = -np.inf
+            n_keep = min(self.value, n_node-1)
+            top_iy = np.argpartition(-node_weight, n_keep-1,
+                                     axis=1)[:, :n_keep]
+            is_top = np.zeros((n_node, n_node), dtype=bool)
+            is_top[np.arange(n_node)[:, np.newaxis], top_iy] = True
+            keep = is_top[edge_ix, edge_iy]
+            if is_symmetric:
+                keep |= is_top[edge_iy, edge_ix]
+
+        elif self.method == 'mst':
+            if not is_symmetric:
+                raise ValueError('mst pruning requires a symmetric' +
+                                 ' adjacency matrix')
+            # Maximum spanning tree is the minimum tree of negated weights
+            tree = minimum_spanning_tree(
+                sp.csr_matrix((-weight, (edge_ix, edge_iy)),
+                              shape=(n_node, n_node))).tocoo()
+            in_tree = np.zeros((n_node, n_node), dtype=bool)
+            in_tree[tree.row, tree.col] = True
+            in_tree |= in_tree.T
+            keep = in_tree[edge_ix, edge_iy] | \
+                self._strongest(weight, self.value)
+
+        # Assemble the pruned network
+        keep_ix, keep_iy = edge_ix[keep], edge_iy[keep]
+        if is_symmetric:
+            keep_ix, keep_iy = (np.r_[keep_ix, keep_iy],
+                                np.r_[keep_iy, keep_ix])
+        adj_prune = sp.csr_matrix((adj[keep_ix, keep_iy], (keep_ix, keep_iy)),
+                                  shape=(n_node, n_node))
+
+        new_packet = {}
+        new_packet[hkey] = {
+            'data': adj_prune,
+            'meta': {
+                'ax_0': signal_packet[hkey]['meta']['ax_0'],
+                'ax_1': signal_packet[hkey]['meta']['ax_1'],
+                'time': signal_packet[hkey]['meta']['time']
+            }
+        }
+
+        return new_packet
@@ -5,6 +5,18 @@ Created by: Ankit Khambhati
 
 Change Log
 ----------
+2026/10/18 - Flow pipes release their resources through _close_flow
+2026/10/18 - The diagonal of condensed packets is cast to the pipe dtype
+2026/10/18 - Shared spectra are opened under a token for each yielded window
+2026/10/18 - Pipes reuse input and output buffers across packets
+2026/10/18 - Shared spectra of a window are freed after its fan-out
+2026/10/18 - Documented the orientation of directed adjacency matrices
+2026/10/18 - Added AdjProcPipe pipe type, topology accepts sparse adjacency
+2026/10/18 - Documented condensed adjacency packets
+2026/10/18 - Pipes cast the data they yield to a configurable float dtype
+2026/10/18 - Documented the band axis of adjacency and topology packets
+2026/10/18 - Falsy signal packets gate the window from downstream pipes
+2026/10/18 - Documented the optional band axis of signal packets
 2016/03/28 - Added GlobalTopoPipe pipe types
 2016/03/10 - Added NodeTopoPipe and EdgeTopoPipe pipe types
 2016/03/08 - Added AdjacencyPipe pipe type
@@ -13,6 +25,7 @@ Change Log
 """
 
 import numpy as np
+import scipy.sparse as sp
 
 import json
 import hashlib
@@ -23,6 +36,7 @@ import copy
 import display
 import except_defs as exceptions
 import errors
+from spectral import open_spectra, release_spectra
 
 
 def coroutine(func):
@@ -45,8 +59,36 @@ class BasePipe(object):
         1. All derived pipe classes must explicitly define all pipe parameters
            as variable names in __init__
         2. No *args or **kwargs may be used
+
+    Precision
+    ---------
+        Numeric data yielded by a pipe is cast to dtype_ (float64 unless set
+        with set_dtype), complex data to the matching complex precision,
+        as is the diagonal of a condensed adjacency.
+
+    Buffers
+    -------
+        Pipes reuse buffers across packets instead of allocating per packet.
+        The shape and dtype of each buffer are negotiated from the first
+        packet received after link(), and again only when they change.
+        1. A pipe receives the data of every packet copied into its own
+           input buffer, so it may modify the data in place without sibling
+           pipes seeing the change
+        2. A pipe may yield data in its own buffers (see _buffer); the data
+           is only overwritten by the next packet, after every downstream
+           pipe has copied it
+        3. A pipe must copy whatever it keeps beyond the current packet
+           (e.g. running state) out of its buffers and its input
+
+    Resources
+    ---------
+        A flow pipe holding resources beyond its buffers (e.g. worker
+        processes) releases them in _close_flow, called when its flow
+        closes.
     """
 
+    dtype_ = np.dtype(np.float64)
+
     @classmethod
     def _get_param_var(cls):
         """Return parameters specified by __init__ method of the class"""
@@ -85,6 +127,84 @@ class BasePipe(object):
 
         return new_packet
 
+    def set_dtype(self, dtype):
+        """Set the floating point precision of the data the pipe yields"""
+        dtype = np.dtype(dtype)
+        if not dtype.kind == 'f':
+            raise TypeError('%r is not a floating point dtype' % dtype)
+        self.dtype_ = dtype
+
+    def _cast_array(self, arr):
+        """Cast a numeric array to the pipe precision, keeping complex"""
+        if arr.dtype.kind == 'c':
+            dtype = np.promote_types(self.dtype_, np.complex64)
+        elif arr.dtype.kind in 'fiu':
+            dtype = self.dtype_
+        else:
+            return arr
+
+        return arr.astype(dtype, copy=False)
+
+    def _cast_signal_packet(self, signal_packet):
+        """
+        Cast the data of the signal packet, and the diagonal of a condensed
+        adjacency, to the pipe precision
+        """
+        hkey = signal_packet.keys()[0]
+        if not isinstance(signal_packet[hkey], dict):
+            return signal_packet
+        data = signal_packet[hkey].get('data')
+        if sp.issparse(data):
+            if not data.dtype == self.dtype_:
+                signal_packet[hkey]['data'] = data.astype(self.dtype_)
+            return signal_packet
+        if not isinstance(data, np.ndarray):
+            return signal_packet
+        signal_packet[hkey]['data'] = self._cast_array(data)
+
+        condensed = signal_packet[hkey].get('meta', {}).get('condensed')
+        if isinstance(condensed, dict) and \
+           isinstance(condensed.get('index'), np.ndarray):
+            condensed['index'] = self._cast_array(condensed['index'])
+
+        return signal_packet
+
+    def _buffer(self, name, shape, dtype=None):
+        """
+        Return the buffer called name owned by the pipe (uninitialized),
+        allocated again only when its shape or dtype (default dtype_) change
+        """
+        dtype = self.dtype_ if dtype is None else np.dtype(dtype)
+        try:
+            buffers = self.buffers_
+        except AttributeError:
+            buffers = self.buffers_ = {}
+
+        buf = buffers.get(name)
+        if (buf is None) or (buf.shape != tuple(shape)) or \
+           (buf.dtype != dtype):
+            buf = buffers[name] = np.empty(shape, dtype=dtype)
+
+        return buf
+
+    def _close_flow(self):
+        """Release the resources held by the pipe once its flow closes"""
+        pass
+
+    def _receive_signal_packet(self, signal_packet):
+        """Copy a received signal packet, its data into the input buffer"""
+        hkey = signal_packet.keys()[0]
+        data = None
+        if isinstance(signal_packet[hkey], dict):
+            data = signal_packet[hkey].get('data')
+        if not isinstance(data, np.ndarray):
+            return copy.deepcopy(signal_packet)
+
+        buf = self._buffer('input', data.shape, data.dtype)
+        np.copyto(buf, data)
+
+        return copy.deepcopy(signal_packet, {id(data): buf})
+
     @classmethod
     def get_valid_link(self):
         """Return list of pipe types the current pipe type can link to"""
@@ -107,6 +227,8 @@ class BasePipe(object):
                     raise exceptions.PipeLinkError(
                         '%r must be one of the following pipe types: %r' %
                         (downstream_pipe, self.get_valid_link()))
+                # Buffers are negotiated anew from the first linked packet
+                downstream_pipe.buffers_ = {}
                 self.downstream_pipe_flow.append(
                     downstream_pipe.apply_pipe_as_flow())
 
@@ -128,6 +250,7 @@ class BasePipe(object):
                 break
 
             signal_packet = self._tag_signal_packet(signal_packet)
+            signal_packet = self._cast_signal_packet(signal_packet)
             self._verify_signal_packet(signal_packet)
 
             try:
@@ -137,8 +260,12 @@ class BasePipe(object):
                     '%r must link to downstream pipe using link() method' %
                     self.__class__.__name__)
 
-            for downstream_pipe in self.downstream_pipe_flow:
-                downstream_pipe.send(signal_packet)
+            window_token = open_spectra()
+            try:
+                for downstream_pipe in self.downstream_pipe_flow:
+                    downstream_pipe.send(signal_packet)
+            finally:
+                release_spectra(window_token)
 
         gen.close()
         for downstream_pipe in self.downstream_pipe_flow:
@@ -155,18 +282,22 @@ class BasePipe(object):
                 '%r does not have _pipe_as_flow implemented' %
                 self.__class__.__name__)
 
+        self.n_packet_ = 0
+        self.n_drop_ = 0
         while True:
             try:
                 signal_packet = (yield)
             except GeneratorExit:
                 display.my_display('\nClosing Flow Pipe: %r' %
                                    self.__class__.__name__)
+                if self.n_drop_:
+                    display.my_display(' (dropped %d of %d windows)' %
+                                       (self.n_drop_, self.n_packet_))
+                self._close_flow()
                 break
 
-            signal_packet = self._pipe_as_flow(copy.deepcopy(signal_packet))
-            if signal_packet:
-                signal_packet = self._retag_signal_packet(signal_packet)
-                self._verify_signal_packet(signal_packet)
+            signal_packet = self._pipe_as_flow(
+                self._receive_signal_packet(signal_packet))
 
             try:
                 self.downstream_pipe_flow
@@ -175,8 +306,23 @@ class BasePipe(object):
                     '%r must link to downstream pipe using link() method' %
                     self.__class__.__name__)
 
-            for downstream_pipe in self.downstream_pipe_flow:
-                downstream_pipe.send(signal_packet)
+            # A falsy signal_packet gates the window, nothing downstream runs
+            self.n_packet_ += 1
+            if not signal_packet:
+                if self.downstream_pipe_flow:
+                    self.n_drop_ += 1
+                continue
+
+            signal_packet = self._retag_signal_packet(signal_packet)
+            signal_packet = self._cast_signal_packet(signal_packet)
+            self._verify_signal_packet(signal_packet)
+
+            window_token = open_spectra()
+            try:
+                for downstream_pipe in self.downstream_pipe_flow:
+                    downstream_pipe.send(signal_packet)
+            finally:
+                release_spectra(window_token)
 
         for downstream_pipe in self.downstream_pipe_flow:
             downstream_pipe.close()
@@ -298,6 +444,12 @@ class PreprocPipe(BasePipe):
                             Describes what n_node represents
                         b. index: numpy.ndarray
                             String label for each node
+                    iii. band: dict (optional)
+                        a. label: str
+                            Describes the frequency bands
+                        b. index: numpy.ndarray, shape: [n_band x 2]
+                            [low, high] cutoffs of each band;
+                            data gains a leading n_band axis
 
     Yields
     ------
@@ -316,6 +468,12 @@ class PreprocPipe(BasePipe):
                             Describes what n_node represents
                         b. index: numpy.ndarray
                             String label for each node
+                    iii. band: dict (optional)
+                        a. label: str
+                            Describes the frequency bands
+                        b. index: numpy.ndarray, shape: [n_band x 2]
+                            [low, high] cutoffs of each band;
+                            data gains a leading n_band axis
 
     Linkable pipe types:
         None
@@ -376,13 +534,20 @@ class AdjacencyPipe(BasePipe):
                             Describes what n_node represents
                         b. index: numpy.ndarray
                             String label for each node
+                    iii. band: dict (optional)
+                        a. label: str
+                            Describes the frequency bands
+                        b. index: numpy.ndarray, shape: [n_band x 2]
+                            [low, high] cutoffs of each band;
+                            data gains a leading n_band axis
 
     Yields
     ------
         signal_packet: dict
             1) hashkey: dict
                 A) data: numpy.ndarray, shape: [n_node x n_node]
-                    Connectivity between nodes
+                    Connectivity between nodes; directed measures hold
+                    the edge from the ax_0 node to the ax_1 node
                 B) meta: dict
                     i. ax_0: dict
                         a. label: str
@@ -399,6 +564,19 @@ class AdjacencyPipe(BasePipe):
                             Describes the unit of measurement
                         b. index: float
                             Timestamp represented by this packet
+                    iv. band: dict (optional)
+                        a. label: str
+                            Describes the frequency bands
+                        b. index: numpy.ndarray, shape: [n_band x 2]
+                            [low, high] cutoffs of each band;
+                            data gains a leading n_band axis
+                    v. condensed: dict (optional)
+                        a. label: str
+                            Describes the diagonal
+                        b. index: numpy.ndarray, shape: [n_node]
+                            Diagonal of the adjacency matrix; data then
+                            holds the upper triangle of the matrix, row by
+                            row, shape: [n_node(n_node-1)/2]
 
     Linkable pipe types:
         None
@@ -435,7 +613,92 @@ class AdjacencyPipe(BasePipe):
         errors.check_type(signal_packet[hkey]['meta']['time']['index'], float)
 
     def get_valid_link(self):
-        return [GlobalTopoPipe,
+        return [AdjProcPipe,
+                GlobalTopoPipe,
+                NodeTopoPipe,
+                EdgeTopoPipe,
+                LoggerPipe]
+
+
+class AdjProcPipe(BasePipe):
+    """
+    Pipe Type: AdjProcPipe
+
+    Accepts
+    -------
+         signal_packet: dict
+            1) hashkey: dict
+                A) data: numpy.ndarray, shape: [n_node x n_node]
+                    Connectivity between nodes
+                B) meta: dict
+                    (see AdjacencyPipe Yields)
+
+    Yields
+    ------
+        signal_packet: dict
+            1) hashkey: dict
+                A) data: numpy.ndarray or scipy.sparse.csr_matrix,
+                         shape: [n_node x n_node]
+                    Processed connectivity between nodes
+                B) meta: dict
+                    i. ax_0: dict
+                        a. label: str
+                            Describes what n_node represents
+                        b. index: numpy.ndarray
+                            String label for each node
+                    ii. ax_1: dict
+                        a. label: str
+                            Describes what n_node represents
+                        b. index: numpy.ndarray
+                            String label for each node
+                    iii. time: dict
+                        a. label: str
+                            Describes the unit of measurement
+                        b. index: float
+                            Timestamp represented by this packet
+
+    Linkable pipe types:
+        None
+        LoggerPipe
+        AdjProcPipe
+        GlobalTopoPipe
+        NodeTopoPipe
+        EdgeTopoPipe
+    """
+
+    def _verify_signal_packet(self, signal_packet):
+        """Ensure signal packet is organized properly"""
+        errors.check_type(signal_packet, dict)
+        if len(signal_packet.keys()) > 1:
+            raise ValueError('signal_packet base-level should contain only' +
+                             ' the pipe hash identifier as key')
+        hkey = signal_packet.keys()[0]
+
+        errors.check_has_key(signal_packet[hkey], 'data')
+        errors.check_has_key(signal_packet[hkey], 'meta')
+        errors.check_has_key(signal_packet[hkey]['meta'], 'ax_0')
+        errors.check_has_key(signal_packet[hkey]['meta'], 'ax_1')
+        errors.check_has_key(signal_packet[hkey]['meta']['ax_0'], 'label')
+        errors.check_has_key(signal_packet[hkey]['meta']['ax_0'], 'index')
+        errors.check_has_key(signal_packet[hkey]['meta']['ax_1'], 'label')
+        errors.check_has_key(signal_packet[hkey]['meta']['ax_1'], 'index')
+        errors.check_has_key(signal_packet[hkey]['meta']['time'], 'label')
+        errors.check_has_key(signal_packet[hkey]['meta']['time'], 'index')
+
+        errors.check_type(signal_packet[hkey]['data'],
+                          (np.ndarray, sp.spmatrix))
+        errors.check_type(signal_packet[hkey]['meta']['ax_0']['label'], str)
+        errors.check_type(signal_packet[hkey]['meta']['ax_0']['index'],
+                          np.ndarray)
+        errors.check_type(signal_packet[hkey]['meta']['ax_1']['label'], str)
+        errors.check_type(signal_packet[hkey]['meta']['ax_1']['index'],
+                          np.ndarray)
+        errors.check_type(signal_packet[hkey]['meta']['time']['label'], str)
+        errors.check_type(signal_packet[hkey]['meta']['time']['index'], float)
+
+    def get_valid_link(self):
+        return [AdjProcPipe,
+                GlobalTopoPipe,
                 NodeTopoPipe,
                 EdgeTopoPipe,
                 LoggerPipe]
@@ -449,7 +712,8 @@ class GlobalTopoPipe(BasePipe):
     -------
          signal_packet: dict
             1) hashkey: dict
-                A) data: numpy.ndarray, shape: [n_node x n_node]
+                A) data: numpy.ndarray or scipy.sparse.spmatrix,
+                         shape: [n_node x n_node]
                     Connectivity between nodes
                 B) meta: dict
                     i. ax_0: dict
@@ -467,6 +731,19 @@ class GlobalTopoPipe(BasePipe):
                             Describes the unit of measurement
                         b. index: float
                             Timestamp represented by this packet
+                    iv. band: dict (optional)
+                        a. label: str
+                            Describes the frequency bands
+                        b. index: numpy.ndarray, shape: [n_band x 2]
+                            [low, high] cutoffs of each band;
+                            data gains a leading n_band axis
+                    v. condensed: dict (optional)
+                        a. label: str
+                            Describes the diagonal
+                        b. index: numpy.ndarray, shape: [n_node]
+                            Diagonal of the adjacency matrix; data then
+                            holds the upper triangle of the matrix, row by
+                            row, shape: [n_node(n_node-1)/2]
 
     Yields
     ------
@@ -480,6 +757,12 @@ class GlobalTopoPipe(BasePipe):
                             Describes the unit of measurement
                         b. index: float
                             Timestamp represented by this packet
+                    ii. band: dict (optional)
+                        a. label: str
+                            Describes the frequency bands
+                        b. index: numpy.ndarray, shape: [n_band x 2]
+                            [low, high] cutoffs of each band;
+                            data gains a leading n_band axis
 
     Linkable pipe types:
         None
@@ -499,7 +782,8 @@ class GlobalTopoPipe(BasePipe):
         errors.check_has_key(signal_packet[hkey]['meta']['time'], 'label')
         errors.check_has_key(signal_packet[hkey]['meta']['time'], 'index')
 
-        errors.check_type(signal_packet[hkey]['data'], np.ndarray)
+        errors.check_type(signal_packet[hkey]['data'],
+                          (np.ndarray, sp.spmatrix))
         errors.check_type(signal_packet[hkey]['meta']['time']['label'], str)
         errors.check_type(signal_packet[hkey]['meta']['time']['index'], float)
 
@@ -515,7 +799,8 @@ class NodeTopoPipe(BasePipe):
     -------
          signal_packet: dict
             1) hashkey: dict
-                A) data: numpy.ndarray, shape: [n_node x n_node]
+                A) data: numpy.ndarray or scipy.sparse.spmatrix,
+                         shape: [n_node x n_node]
                     Connectivity between nodes
                 B) meta: dict
                     i. ax_0: dict
@@ -533,6 +818,19 @@ class NodeTopoPipe(BasePipe):
                             Describes the unit of measurement
                         b. index: float
                             Timestamp represented by this packet
+                    iv. band: dict (optional)
+                        a. label: str
+                            Describes the frequency bands
+                        b. index: numpy.ndarray, shape: [n_band x 2]
+                            [low, high] cutoffs of each band;
+                            data gains a leading n_band axis
+                    v. condensed: dict (optional)
+                        a. label: str
+                            Describes the diagonal
+                        b. index: numpy.ndarray, shape: [n_node]
+                            Diagonal of the adjacency matrix; data then
+                            holds the upper triangle of the matrix, row by
+                            row, shape: [n_node(n_node-1)/2]
 
     Yields
     ------
@@ -551,6 +849,12 @@ class NodeTopoPipe(BasePipe):
                             Describes the unit of measurement
                         b. index: float
                             Timestamp represented by this packet
+                    iv. band: dict (optional)
+                        a. label: str
+                            Describes the frequency bands
+                        b. index: numpy.ndarray, shape: [n_band x 2]
+                            [low, high] cutoffs of each band;
+                            data gains a leading n_band axis
 
     Linkable pipe types:
         None
@@ -573,7 +877,8 @@ class NodeTopoPipe(BasePipe):
         errors.check_has_key(signal_packet[hkey]['meta']['time'], 'label')
         errors.check_has_key(signal_packet[hkey]['meta']['time'], 'index')
 
-        errors.check_type(signal_packet[hkey]['data'], np.ndarray)
+        errors.check_type(signal_packet[hkey]['data'],
+                          (np.ndarray, sp.spmatrix))
         errors.check_type(signal_packet[hkey]['meta']['ax_0']['label'], str)
         errors.check_type(signal_packet[hkey]['meta']['ax_0']['index'],
                           np.ndarray)
@@ -592,7 +897,8 @@ class EdgeTopoPipe(BasePipe):
     -------
          signal_packet: dict
             1) hashkey: dict
-                A) data: numpy.ndarray, shape: [n_node x n_node]
+                A) data: numpy.ndarray or scipy.sparse.spmatrix,
+                         shape: [n_node x n_node]
                     Connectivity between nodes
                 B) meta: dict
                     i. ax_0: dict
@@ -610,6 +916,19 @@ class EdgeTopoPipe(BasePipe):
                             Describes the unit of measurement
                         b. index: float
                             Timestamp represented by this packet
+                    iv. band: dict (optional)
+                        a. label: str
+                            Describes the frequency bands
+                        b. index: numpy.ndarray, shape: [n_band x 2]
+                            [low, high] cutoffs of each band;
+                            data gains a leading n_band axis
+                    v. condensed: dict (optional)
+                        a. label: str
+                            Describes the diagonal
+                        b. index: numpy.ndarray, shape: [n_node]
+                            Diagonal of the adjacency matrix; data then
+                            holds the upper triangle of the matrix, row by
+                            row, shape: [n_node(n_node-1)/2]
 
     Yields
     ------
@@ -633,6 +952,19 @@ class EdgeTopoPipe(BasePipe):
                             Describes the unit of measurement
                         b. index: float
                             Timestamp represented by this packet
+                    iv. band: dict (optional)
+                        a. label: str
+                            Describes the frequency bands
+                        b. index: numpy.ndarray, shape: [n_band x 2]
+                            [low, high] cutoffs of each band;
+                            data gains a leading n_band axis
+                    v. condensed: dict (optional)
+                        a. label: str
+                            Describes the diagonal
+                        b. index: numpy.ndarray, shape: [n_node]
+                            Diagonal of the adjacency matrix; data then
+                            holds the upper triangle of the matrix, row by
+                            row, shape: [n_node(n_node-1)/2]
 
     Linkable pipe types:
         None
@@ -657,7 +989,8 @@ class EdgeTopoPipe(BasePipe):
         errors.check_has_key(signal_packet[hkey]['meta']['time'], 'label')
         errors.check_has_key(signal_packet[hkey]['meta']['time'], 'index')
 
-        errors.check_type(signal_packet[hkey]['data'], np.ndarray)
+        errors.check_type(signal_packet[hkey]['data'],
+                          (np.ndarray, sp.spmatrix))
         errors.check_type(signal_packet[hkey]['meta']['ax_0']['label'], str)
         errors.check_type(signal_packet[hkey]['meta']['ax_0']['index'],
                           np.ndarray)
@@ -5,6 +5,9 @@ Created by: Ankit Khambhati
 
 Change Log
 ----------
+2026/10/18 - EdgeSyncCentral removes edges in place instead of copying
+2026/10/18 - EdgeSyncCentral yields condensed output for condensed input
+2026/10/18 - EdgeSyncCentral consumes band-stacked adjacency matrices
 2016/03/10 - Implemented EdgeSyncCentral
 """
 
@@ -12,55 +15,50 @@ from __future__ import division
 import numpy as np
 
 from ..base import EdgeTopoPipe
+from ..graphtools import (adjacency, is_condensed, condense_signal_packet,
+                          synchronizability)
 
 
 class EdgeSyncCentral(EdgeTopoPipe):
     """
     EdgeSyncCentral class for computing synchronizing/desynchronizing centrality
     of the edges
+
+    Adjacency matrices with a leading band axis are solved as one batch for
+    each removed edge. Condensed adjacency matrices yield condensed
+    centrality.
     """
 
     def __init__(self):
         self = self
 
     def _pipe_as_flow(self, signal_packet):
-        def global_sync(adj_matr):
-            """Compute synchronizability"""
-
-            # Get the degree vector of the adj
-            deg_vec = np.sum(adj_matr, axis=0)
-            deg_matr = np.diag(deg_vec)
-
-            # Laplacian
-            lapl = deg_matr - adj_matr
-
-            # Compute eigenvalues and eigenvectors, ensure they are real
-            eigval, eigvec = np.linalg.eig(lapl)
-            eigval = np.real(eigval)
-
-            # Sort smallest to largest eigenvalue
-            eigval = np.sort(eigval)
-            sync = np.abs(eigval[1] / eigval[-1]).reshape(1, 1)
-
-            return sync
-
         # Get signal_packet details
         hkey = signal_packet.keys()[0]
-        adj = signal_packet[hkey]['data']
-        triu_ix, triu_iy = np.triu_indices_from(adj, k=1)
+        adj = adjacency(signal_packet)
+        triu_ix, triu_iy = np.triu_indices(adj.shape[-1], k=1)
 
-        centrality = np.zeros_like(adj)
-        base_sync = global_sync(adj)
+        centrality = self._buffer('centrality', adj.shape)
+        centrality.fill(0)
+        base_sync = synchronizability(adj)
+
+        # Remove each edge from the (owned) adjacency in place, then restore
         for n1, n2 in zip(triu_ix, triu_iy):
-            adj_mod = adj.copy()
-            adj_mod[n1, n2] = 0
-            adj_mod[n2, n1] = 0
+            edge_12 = adj[..., n1, n2].copy()
+            edge_21 = adj[..., n2, n1].copy()
+            adj[..., n1, n2] = 0
+            adj[..., n2, n1] = 0
+
+            mod_sync = synchronizability(adj)
+            centrality[..., n1, n2] = (mod_sync-base_sync) / base_sync
+            centrality[..., n2, n1] = (mod_sync-base_sync) / base_sync
 
-            mod_sync = global_sync(adj_mod)
-            centrality[n1, n2] = (mod_sync-base_sync) / base_sync
-            centrality[n2, n1] = (mod_sync-base_sync) / base_sync
+            adj[..., n1, n2] = edge_12
+            adj[..., n2, n1] = edge_21
 
         # Dump into signal_packet
         signal_packet[hkey]['data'] = centrality
+        if is_condensed(signal_packet):
+            condense_signal_packet(signal_packet)
 
         return signal_packet
@@ -5,6 +5,9 @@ Created by: Ankit Khambhati
 
 Change Log
 ----------
+2026/10/18 - Synchronizability accepts sparse adjacency matrices
+2026/10/18 - Synchronizability accepts condensed adjacency matrices
+2026/10/18 - Synchronizability consumes band-stacked adjacency matrices
 2016/03/10 - Implemented DegrCentral, EvecCentral, SyncCentral pipes
 """
 
@@ -12,50 +15,38 @@ from __future__ import division
 import numpy as np
 
 from ..base import GlobalTopoPipe
+from ..graphtools import adjacency, synchronizability
 
 
 class Synchronizability(GlobalTopoPipe):
     """
     Synchronizability class for computing synchronizability of the network
+
+    Adjacency matrices with a leading band axis are solved as one batch and
+    yield data of shape [n_band x 1 x 1]. Sparse adjacency matrices are
+    solved for the extremal Laplacian eigenvalues only, by Lanczos iteration.
     """
 
     def __init__(self):
         self = self
 
     def _pipe_as_flow(self, signal_packet):
-        def global_sync(adj_matr):
-            """Compute synchronizability"""
-
-            # Get the degree vector of the adj
-            deg_vec = np.sum(adj_matr, axis=0)
-            deg_matr = np.diag(deg_vec)
-
-            # Laplacian
-            lapl = deg_matr - adj_matr
-
-            # Compute eigenvalues and eigenvectors, ensure they are real
-            eigval, eigvec = np.linalg.eig(lapl)
-            eigval = np.real(eigval)
-
-            # Sort smallest to largest eigenvalue
-            eigval = np.sort(eigval)
-            sync = np.abs(eigval[1] / eigval[-1]).reshape(1, 1)
-
-            return sync
-
         # Get signal_packet details
         hkey = signal_packet.keys()[0]
-        adj = signal_packet[hkey]['data']
+        adj = adjacency(signal_packet, allow_sparse=True)
 
-        base_sync = global_sync(adj)
+        base_sync = synchronizability(adj)[..., np.newaxis, np.newaxis]
 
         # Dump into signal_packet
         new_packet = {}
         new_packet[hkey] = {
-            'data': np.array(base_sync).reshape(1, 1),
+            'data': base_sync,
             'meta': {
                 'time': signal_packet[hkey]['meta']['time']
             }
         }
+        if 'band' in signal_packet[hkey]['meta']:
+            new_packet[hkey]['meta']['band'] = \
+                signal_packet[hkey]['meta']['band']
 
         return new_packet
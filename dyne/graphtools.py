@@ -0,0 +1,313 @@
+"""
+Graph utilities shared by the topology pipes
+
+All functions treat any leading axes of the adjacency matrix (e.g. the band
+axis of a multi-band adjacency signal_packet) as a batch. Eigen-solves are
+always done in at least double precision.
+
+A symmetric adjacency signal_packet may be condensed: its data then holds
+the upper triangle of each matrix, row by row as in
+scipy.spatial.distance.squareform, with shape [... x n_node(n_node-1)/2],
+and meta['condensed']['index'] holds the diagonal, [... x n_node].
+
+Sparse adjacency matrices (scipy.sparse, one matrix per packet) are solved
+with Lanczos/Arnoldi iterations instead of dense eigen-solves.
+
+Created by: Ankit Khambhati
+
+Change Log
+----------
+2026/10/18 - condense_signal_packet takes edges filled directly by a pipe
+2026/10/18 - degree of condensed adjacency keeps the precision of the edges
+2026/10/18 - Sparse synchronizability of signed graphs uses the dense solver
+2026/10/18 - Sparse adjacency support with Lanczos eigen-solves
+2026/10/18 - Added the condensed (upper-triangle) adjacency representation
+2026/10/18 - Eigen-solves promote single precision input to float64
+2026/10/18 - Added laplacian, synchronizability and leading_eigvec
+"""
+
+from __future__ import division
+import numpy as np
+import scipy.sparse as sp
+import scipy.sparse.linalg as spla
+
+
+def condense(adj):
+    """
+    Condense symmetric adjacency matrices to their upper triangle
+
+    Parameters
+    ----------
+        adj: numpy.ndarray, shape: [... x n_node x n_node]
+            Connectivity between nodes
+
+    Returns
+    -------
+        edge: numpy.ndarray, shape: [... x n_node(n_node-1)/2]
+            Upper triangle of each matrix, row by row
+
+        diag: numpy.ndarray, shape: [... x n_node]
+            Diagonal of each matrix
+    """
+
+    n_node = adj.shape[-1]
+    triu_ix, triu_iy = np.triu_indices(n_node, k=1)
+    diag_ix = np.arange(n_node)
+
+    return adj[..., triu_ix, triu_iy], adj[..., diag_ix, diag_ix]
+
+
+def expand(edge, diag):
+    """
+    Expand condensed adjacency matrices to full symmetric matrices
+
+    Parameters
+    ----------
+        edge: numpy.ndarray, shape: [... x n_node(n_node-1)/2]
+            Upper triangle of each matrix, row by row
+
+        diag: numpy.ndarray, shape: [... x n_node]
+            Diagonal of each matrix
+
+    Returns
+    -------
+        adj: numpy.ndarray, shape: [... x n_node x n_node]
+            Connectivity between nodes
+    """
+
+    n_node = diag.shape[-1]
+    triu_ix, triu_iy = np.triu_indices(n_node, k=1)
+    diag_ix = np.arange(n_node)
+
+    adj = np.empty(diag.shape + (n_node,), dtype=np.result_type(edge, diag))
+    adj[..., triu_ix, triu_iy] = edge
+    adj[..., triu_iy, triu_ix] = edge
+    adj[..., diag_ix, diag_ix] = diag
+
+    return adj
+
+
+def condense_signal_packet(signal_packet, diag=None):
+    """
+    Replace the adjacency of a signal_packet with its condensed form
+
+    Pipes that fill the upper triangle directly (Corr, CorrMag, XCorrMag,
+    PLI, WelchCoh, MTCoh) pass its diagonal as diag, the data then already
+    holds the condensed edges and the full matrices are never formed. Pipes
+    whose estimate is a full cross-product (PLV, ImCoh, WPLI, Granger,
+    incremental correlation) form the full matrices and are condensed here,
+    so only the payload sent downstream is halved.
+    """
+    hkey = signal_packet.keys()[0]
+    if diag is None:
+        edge, diag = condense(signal_packet[hkey]['data'])
+        signal_packet[hkey]['data'] = edge
+    signal_packet[hkey]['meta']['condensed'] = {
+        'label': 'Diagonal of the adjacency matrix',
+        'index': diag}
+
+    return signal_packet
+
+
+def is_condensed(signal_packet):
+    """Check whether the adjacency of a signal_packet is condensed"""
+    hkey = signal_packet.keys()[0]
+    return 'condensed' in signal_packet[hkey]['meta']
+
+
+def adjacency(signal_packet, allow_sparse=False):
+    """
+    Return the full adjacency of a signal_packet, expanding if needed
+
+    Sparse adjacency matrices are densified unless allow_sparse is set.
+    """
+    hkey = signal_packet.keys()[0]
+    adj = signal_packet[hkey]['data']
+    if is_condensed(signal_packet):
+        return expand(adj, signal_packet[hkey]['meta']['condensed']['index'])
+    if sp.issparse(adj) and not allow_sparse:
+        return adj.toarray()
+
+    return adj
+
+
+def degree(signal_packet):
+    """
+    Weighted degree of every node, read from the condensed form directly
+
+    Returns
+    -------
+        deg: numpy.ndarray, shape: [... x n_node]
+            Column sums of each adjacency matrix
+    """
+
+    hkey = signal_packet.keys()[0]
+    if sp.issparse(signal_packet[hkey]['data']):
+        return np.asarray(signal_packet[hkey]['data'].sum(axis=0)).ravel()
+    if not is_condensed(signal_packet):
+        return np.sum(signal_packet[hkey]['data'], axis=-2)
+
+    # Sum the edges incident to each node through a sparse incidence matrix
+    edge = signal_packet[hkey]['data']
+    diag = signal_packet[hkey]['meta']['condensed']['index']
+    n_node = diag.shape[-1]
+    triu_ix, triu_iy = np.triu_indices(n_node, k=1)
+    edge_ix = np.arange(len(triu_ix))
+    incidence = sp.csr_matrix(
+        (np.ones(2*len(edge_ix), dtype=edge.dtype),
+         (np.r_[triu_ix, triu_iy], np.r_[edge_ix, edge_ix])),
+        shape=(n_node, len(edge_ix)))
+    deg = incidence.dot(edge.reshape(-1, len(edge_ix)).T).T
+
+    return deg.reshape(diag.shape) + diag
+
+
+def _promote(matr):
+    """Promote a stack of matrices to at least double precision"""
+    dtype = np.promote_types(matr.dtype, np.float64)
+    if sp.issparse(matr):
+        return matr.astype(dtype)
+    return np.asarray(matr, dtype=dtype)
+
+
+def _is_symmetric(matr):
+    """Check whether every matrix in a stack is symmetric"""
+    if sp.issparse(matr):
+        if matr.nnz == 0:
+            return True
+        return abs(matr - matr.T).max() <= 1e-8 + 1e-5*abs(matr).max()
+    return np.allclose(matr, np.swapaxes(matr, -1, -2))
+
+
+def _sparse_synchronizability(lapl):
+    """Synchronizability from the extremal eigenvalues of a sparse Laplacian"""
+    if _is_symmetric(lapl):
+        eig_max = spla.eigsh(lapl, k=1, which='LA',
+                             return_eigenvectors=False)[0]
+    else:
+        eig_max = np.real(spla.eigs(lapl, k=1, which='LR',
+                                    return_eigenvectors=False)[0])
+    if eig_max == 0:
+        return np.asarray(np.nan)
+
+    # Shift-invert just below the spectrum for the two smallest eigenvalues
+    sigma = -1e-2 * eig_max
+    if _is_symmetric(lapl):
+        eig_min = spla.eigsh(lapl, k=2, sigma=sigma, which='LM',
+                             return_eigenvectors=False)
+    else:
+        eig_min = np.real(spla.eigs(lapl, k=2, sigma=sigma, which='LM',
+                                    return_eigenvectors=False))
+
+    return np.asarray(np.abs(np.sort(eig_min)[1] / eig_max))
+
+
+def _sparse_leading_eigvec(matr):
+    """Leading eigenvector of a sparse matrix by Lanczos/Arnoldi iteration"""
+    if _is_symmetric(matr):
+        eigvec = spla.eigsh(matr, k=1, which='LA')[1]
+    else:
+        eigvec = np.real(spla.eigs(matr, k=1, which='LR')[1])
+
+    return np.abs(eigvec[:, 0])
+
+
+def laplacian(adj):
+    """
+    Laplacian of the graph, built from the column degree of each node
+
+    Parameters
+    ----------
+        adj: numpy.ndarray or scipy.sparse.spmatrix,
+             shape: [... x n_node x n_node]
+            Connectivity between nodes
+
+    Returns
+    -------
+        lapl: numpy.ndarray or scipy.sparse.csr_matrix,
+              shape: [... x n_node x n_node]
+            Graph Laplacian
+    """
+
+    if sp.issparse(adj):
+        return (sp.diags(np.asarray(adj.sum(axis=0)).ravel()) - adj).tocsr()
+
+    n_node = adj.shape[-1]
+    lapl = -adj
+    lapl[..., np.arange(n_node), np.arange(n_node)] += np.sum(adj, axis=-2)
+
+    return lapl
+
+
+def synchronizability(adj):
+    """
+    Synchronizability of the graph, the ratio of the second smallest to the
+    largest eigenvalue of its Laplacian
+
+    Symmetric Laplacians are solved with the Hermitian eigensolver, others
+    with the general eigensolver keeping the real part of the eigenvalues.
+    Sparse Laplacians are solved for their extremal eigenvalues only, by a
+    shift-invert that assumes a positive semi-definite Laplacian; sparse
+    graphs with any negative weight are densified instead.
+
+    Parameters
+    ----------
+        adj: numpy.ndarray or scipy.sparse.spmatrix,
+             shape: [... x n_node x n_node]
+            Connectivity between nodes
+
+    Returns
+    -------
+        sync: numpy.ndarray, shape: [...]
+            Synchronizability of each graph
+    """
+
+    adj = _promote(adj)
+    lapl = laplacian(adj)
+    if sp.issparse(lapl):
+        if (lapl.shape[0] > 3) and (adj.min() >= 0):
+            return _sparse_synchronizability(lapl)
+        lapl = lapl.toarray()
+    if _is_symmetric(lapl):
+        eigval = np.linalg.eigvalsh(lapl)
+    else:
+        eigval = np.sort(np.real(np.linalg.eigvals(lapl)), axis=-1)
+
+    return np.abs(eigval[..., 1] / eigval[..., -1])
+
+
+def leading_eigvec(matr):
+    """
+    Magnitude of the eigenvector with the largest eigenvalue
+
+    Parameters
+    ----------
+        matr: numpy.ndarray or scipy.sparse.spmatrix,
+              shape: [... x n_node x n_node]
+            Stack of square matrices
+
+    Returns
+    -------
+        eigvec: numpy.ndarray, shape: [... x n_node]
+            Leading eigenvector of each matrix
+    """
+
+    matr = _promote(matr)
+    if sp.issparse(matr):
+        if matr.shape[0] > 2:
+            return _sparse_leading_eigvec(matr)
+        matr = matr.toarray()
+    if _is_symmetric(matr):
+        eigval, eigvec = np.linalg.eigh(matr)
+    else:
+        eigval, eigvec = np.linalg.eig(matr)
+        eigval = np.real(eigval)
+        eigvec = np.real(eigvec)
+
+    # Select the column of the largest eigenvalue of each matrix
+    n_node = matr.shape[-1]
+    largest_idx = np.argmax(eigval, axis=-1).reshape(-1)
+    eigvec = eigvec.reshape(-1, n_node, n_node)
+    eigvec = eigvec[np.arange(len(largest_idx)), :, largest_idx]
+
+    return np.abs(eigvec).reshape(matr.shape[:-1])
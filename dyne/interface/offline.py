@@ -5,6 +5,7 @@ Created by: Ankit Khambhati
 
 Change Log
 ----------
+2026/10/18 - Windowing delegated to the shared SlidingWindow engine
 2016/03/18 - Implemented CSVSignal pipe
 2016/03/10 - Implemented MATSignal pipe
 """
@@ -15,6 +16,7 @@ import h5py
 
 from ..errors import check_type, check_path, check_has_key
 from ..base import InterfacePipe
+from .window import SlidingWindow
 
 
 class MATSignal(InterfacePipe):
@@ -94,36 +96,16 @@ class MATSignal(InterfacePipe):
             self.node_ = np.array(map(str, np.arange(1, self.n_node_+1)))
 
         # Check window size and displacement
-        self.n_win_len = int(self.win_len * self.sample_frequency_)
-        self.n_win_disp = int(self.win_disp * self.sample_frequency_)
-        if self.n_win_len > self.n_sample_:
-            raise ValueError('win_len cannot be longer than signal duration')
-        self.n_wins = ((self.n_sample_ - self.n_win_len) /
-                       self.n_win_disp) + 1
+        self.window_ = SlidingWindow(self.n_sample_,
+                                     float(self.sample_frequency_),
+                                     self.win_len, self.win_disp)
+        self.n_win_len = self.window_.n_win_len
+        self.n_win_disp = self.window_.n_win_disp
+        self.n_wins = self.window_.n_win
 
     def _pipe_as_source(self):
-        for idx in range(0,
-                         self.n_wins*self.n_win_disp,
-                         self.n_win_disp):
-
-            # window nan adjust
-            win = self.signal_[idx:idx+self.n_win_len, :]
-            nan_idx = np.nonzero(np.isnan(win))
-            win[nan_idx[0], nan_idx[1]] = np.nanmean(win[:, nan_idx[1]], axis=0)
-
-            # Format the signal_packet
-            signal_packet = {}
-            signal_packet['data'] = win
-            signal_packet['meta'] = \
-                {'ax_0':
-                 {'label': 'Time (sec)',
-                  'index': np.arange(idx, idx+self.n_win_len) /
-                                self.sample_frequency_},
-                 'ax_1':
-                 {'label': 'Nodes',
-                  'index': self.node_}
-                }
-
+        for signal_packet in self.window_.iter_signal_packet(self.signal_,
+                                                             self.node_):
             yield signal_packet
 
 
@@ -192,35 +174,15 @@ class CSVSignal(InterfacePipe):
         self.node_ = np.arange(self.n_node_) + 1
 
         # Check window size and displacement
-        self.n_win_len = int(self.win_len * self.sample_frequency)
-        self.n_win_disp = int(self.win_disp * self.sample_frequency)
-        if self.n_win_len > self.n_sample_:
-            raise ValueError('win_len cannot be longer than signal duration')
-        self.n_wins = ((self.n_sample_ - self.n_win_len) /
-                       self.n_win_disp) + 1
+        self.window_ = SlidingWindow(self.n_sample_,
+                                     self.sample_frequency,
+                                     self.win_len, self.win_disp)
+        self.n_win_len = self.window_.n_win_len
+        self.n_win_disp = self.window_.n_win_disp
+        self.n_wins = self.window_.n_win
 
     def _pipe_as_source(self):
-        for idx in range(0,
-                         self.n_wins*self.n_win_disp,
-                         self.n_win_disp):
-
-            # window nan adjust
-            win = self.signal_[idx:idx+self.n_win_len, :]
-            nan_idx = np.nonzero(np.isnan(win))
-            win[nan_idx[0], nan_idx[1]] = np.nanmean(win[:, nan_idx[1]], axis=0)
-
-            # Format the signal_packet
-            signal_packet = {}
-            signal_packet['data'] = win
-            signal_packet['meta'] = \
-                {'ax_0':
-                 {'label': 'Time (sec)',
-                  'index': np.arange(idx, idx+self.n_win_len) /
-                                self.sample_frequency},
-                 'ax_1':
-                 {'label': 'Nodes',
-                  'index': self.node_}
-                }
-
+        for signal_packet in self.window_.iter_signal_packet(self.signal_,
+                                                             self.node_):
             yield signal_packet
 
@@ -0,0 +1,157 @@
+"""
+Prefetch pipes for overlapping source I/O with downstream computation
+
+Created by: Ankit Khambhati
+
+Change Log
+----------
+2026/10/18 - Reader errors keep their traceback, stalls exclude end of source
+2026/10/18 - Implemented PrefetchSignal pipe
+"""
+
+import sys
+import importlib
+import threading
+import Queue
+import time
+
+from ..display import my_display
+from ..errors import check_type
+from ..base import InterfacePipe
+
+_END_OF_SOURCE = object()
+
+
+class _ReaderError(object):
+    """Carry an exception raised on the reader thread to the consumer"""
+
+    def __init__(self, exc_info):
+        self.exc_info = exc_info
+
+
+def _put(buffer_q, item, stop_event):
+    """Block while the buffer is full, but give up on a stop request"""
+    while not stop_event.is_set():
+        try:
+            buffer_q.put(item, timeout=0.1)
+            return
+        except Queue.Full:
+            continue
+
+
+class PrefetchSignal(InterfacePipe):
+    """
+    PrefetchSignal pipe for reading windows ahead on a background thread
+
+    This class wraps another InterfacePipe and pulls its windows on a
+    background thread into a bounded buffer, so that disk reads and
+    decompression overlap with the computation done by downstream pipes.
+    The wrapped pipe is specified the same way as in a pipeline definition.
+
+    Parameters
+    ----------
+        pipe_module: str
+            Module containing the wrapped InterfacePipe
+            (e.g. dyne.interface.offline)
+
+        pipe_class: str
+            Class name of the wrapped InterfacePipe (e.g. MATSignal)
+
+        pipe_param: dict
+            Parameters used to instantiate the wrapped InterfacePipe
+
+        n_prefetch: int
+            Maximum number of windows read ahead of the consumer
+
+    Attributes
+    ----------
+        n_yield_: int
+            Number of windows handed downstream
+
+        n_stall_: int
+            Number of windows the consumer had to wait for
+
+        wait_time_: float
+            Total time (sec) the consumer spent waiting on the reader thread
+
+        read_time_: float
+            Total time (sec) the reader thread spent inside the wrapped pipe
+    """
+
+    def __init__(self, pipe_module, pipe_class, pipe_param, n_prefetch):
+        # Standard param checks
+        check_type(pipe_module, str)
+        check_type(pipe_class, str)
+        check_type(pipe_param, dict)
+        check_type(n_prefetch, int)
+        if n_prefetch < 1:
+            raise ValueError('n_prefetch must be at least 1')
+
+        # Assign to instance
+        self.pipe_module = pipe_module
+        self.pipe_class = pipe_class
+        self.pipe_param = pipe_param
+        self.n_prefetch = n_prefetch
+
+        # Instantiate the wrapped source
+        module = importlib.import_module(self.pipe_module)
+        self.pipe_ = getattr(module, self.pipe_class)(**self.pipe_param)
+        if not isinstance(self.pipe_, InterfacePipe):
+            raise TypeError('%r must be an InterfacePipe' % self.pipe_)
+
+    def _reader(self, buffer_q, stop_event):
+        """Pull windows from the wrapped source into the buffer"""
+        try:
+            gen = self.pipe_._pipe_as_source()
+            while not stop_event.is_set():
+                t_start = time.time()
+                try:
+                    signal_packet = gen.next()
+                except StopIteration:
+                    break
+                self.read_time_ += time.time() - t_start
+                _put(buffer_q, signal_packet, stop_event)
+            gen.close()
+        except Exception:
+            _put(buffer_q, _ReaderError(sys.exc_info()), stop_event)
+            return
+        _put(buffer_q, _END_OF_SOURCE, stop_event)
+
+    def _pipe_as_source(self):
+        self.n_yield_ = 0
+        self.n_stall_ = 0
+        self.wait_time_ = 0.0
+        self.read_time_ = 0.0
+
+        buffer_q = Queue.Queue(maxsize=self.n_prefetch)
+        stop_event = threading.Event()
+        reader = threading.Thread(target=self._reader,
+                                  args=(buffer_q, stop_event))
+        reader.daemon = True
+        reader.start()
+
+        try:
+            while True:
+                t_start = time.time()
+                is_stall = buffer_q.empty()
+                signal_packet = buffer_q.get()
+                self.wait_time_ += time.time() - t_start
+
+                if signal_packet is _END_OF_SOURCE:
+                    break
+                if isinstance(signal_packet, _ReaderError):
+                    # Raise with the traceback of the reader thread
+                    exc_type, exc_value, exc_tb = signal_packet.exc_info
+                    raise exc_type, exc_value, exc_tb
+
+                if is_stall:
+                    self.n_stall_ += 1
+                self.n_yield_ += 1
+                yield signal_packet
+        finally:
+            stop_event.set()
+            reader.join()
+            my_display('\nPrefetch: %d windows, %d stalls, '
+                       '%.3f sec waiting on I/O, %.3f sec reading' %
+                       (self.n_yield_, self.n_stall_,
+                        self.wait_time_, self.read_time_))
@@ -5,6 +5,7 @@ Created by: Ankit Khambhati
 
 Change Log
 ----------
+2026/10/18 - Windowing delegated to the shared SlidingWindow engine
 2016/03/08 - Implemented MvarNormalNoise pipe
 """
 
@@ -13,6 +14,7 @@ import numpy as np
 from ..display import my_display
 from ..errors import check_type
 from ..base import InterfacePipe
+from .window import SlidingWindow
 
 
 class MvarNormalNoise(InterfacePipe):
@@ -30,24 +32,34 @@ class MvarNormalNoise(InterfacePipe):
             Number of samples in a window (signal_packet)
         win_shift: int
             Number of samples to shift the window (signal_packet)
+        sample_frequency: float
+            Sampling frequency used to time stamp the samples (Hz)
 
     Yields
     ------
         signal_packet (see InterfacePipe documentation)
     """
 
-    def __init__(self, n_node, n_sample, win_width, win_shift):
+    def __init__(self, n_node, n_sample, win_width, win_shift,
+                 sample_frequency=1.0):
         # Standard param checks
         check_type(n_node, int)
         check_type(n_sample, int)
         check_type(win_width, int)
         check_type(win_shift, int)
+        check_type(sample_frequency, float)
 
         # Assign to instance
         self.n_node = n_node
         self.n_sample = n_sample
         self.win_width = win_width
         self.win_shift = win_shift
+        self.sample_frequency = sample_frequency
+
+        # Check window size and displacement
+        self.window_ = SlidingWindow(self.n_sample, self.sample_frequency,
+                                     self.win_width, self.win_shift,
+                                     units='sample')
 
     def _pipe_as_source(self):
         rnd_norm_matr = np.random.randn(self.n_node, self.n_node)
@@ -57,25 +69,9 @@ class MvarNormalNoise(InterfacePipe):
                                                rnd_cov_matr,
                                                self.n_sample)
 
-        start_ix = 0
-        while True:
-            clip = signal[start_ix:start_ix+self.win_width, :]
-
-            # Properly format the yield
-            signal_packet = {}
-            signal_packet['data'] = clip
-            signal_packet['meta'] = \
-                    {'ax_0':
-                     {'label': 'Samples',
-                      'index': np.arange(start_ix, start_ix+self.win_width)},
-                     'ax_1':
-                     {'label': 'Nodes',
-                      'index': np.array(map(str, xrange(self.n_node)))}}
+        node_index = np.array(map(str, xrange(self.n_node)))
+        for signal_packet in self.window_.iter_signal_packet(signal,
+                                                             node_index):
             yield signal_packet
 
-            # Advance the pointer
-            start_ix += self.win_shift
-
-            if start_ix+self.win_width > self.n_sample:
-                my_display('\nEnd of signal.\n')
-                break
+        my_display('\nEnd of signal.\n')
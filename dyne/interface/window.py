@@ -0,0 +1,139 @@
+"""
+Sliding-window engine shared by all InterfacePipe sources
+
+Created by: Ankit Khambhati
+
+Change Log
+----------
+2026/10/18 - Windows may be displaced by more than their length
+2026/10/18 - Implemented SlidingWindow engine
+"""
+
+from __future__ import division
+import numpy as np
+
+from ..errors import check_type
+
+
+class SlidingWindow(object):
+    """
+    SlidingWindow engine for cutting a cached signal into signal_packets
+
+    Window length and displacement are resolved to an exact number of
+    samples once, the time index of the full signal is computed once, and
+    each window is handed out as a view into the cached signal and time
+    index wherever the underlying storage allows it.
+
+    Parameters
+    ----------
+        n_sample: int
+            Number of samples in the cached signal
+
+        sample_frequency: float
+            Sampling frequency of the cached signal (Hz)
+
+        win_len: float or int
+            Length of each window
+
+        win_disp: float or int
+            Displacement between consecutive windows, larger than win_len
+            leaves a gap between windows
+
+        units: str
+            Units of win_len and win_disp, either 'sec' or 'sample'
+    """
+
+    def __init__(self, n_sample, sample_frequency, win_len, win_disp,
+                 units='sec'):
+        # Standard param checks
+        check_type(n_sample, int)
+        check_type(sample_frequency, float)
+        if units not in ['sec', 'sample']:
+            raise ValueError('units must be either sec or sample')
+        if sample_frequency <= 0:
+            raise ValueError('sample_frequency must be positive')
+
+        # Assign to instance
+        self.n_sample = n_sample
+        self.sample_frequency = sample_frequency
+        self.units = units
+
+        # Resolve the window geometry to whole samples
+        self.n_win_len = self._to_sample(win_len)
+        self.n_win_disp = self._to_sample(win_disp)
+        if self.n_win_len < 1:
+            raise ValueError('win_len must span at least one sample')
+        if self.n_win_disp < 1:
+            raise ValueError('win_disp must span at least one sample')
+        if self.n_win_len > self.n_sample:
+            raise ValueError('win_len cannot be longer than signal duration')
+        self.n_win = (self.n_sample - self.n_win_len) // self.n_win_disp + 1
+
+        # Time index of the full signal, windows are sliced from this
+        self.time_index_ = np.arange(self.n_sample) / self.sample_frequency
+        self.time_index_.flags.writeable = False
+
+    def _to_sample(self, length):
+        """Convert a window length to an exact number of samples"""
+        if self.units == 'sample':
+            if not float(length).is_integer():
+                raise ValueError('%r is not a whole number of samples' %
+                                 length)
+            return int(length)
+
+        # Round, rather than truncate, so 0.1 sec at 1000 Hz is 100 samples
+        return int(np.round(length * self.sample_frequency))
+
+    def __len__(self):
+        return self.n_win
+
+    def window_slice(self, win_ix):
+        """Return the sample slice spanned by the win_ix-th window"""
+        if not (0 <= win_ix < self.n_win):
+            raise IndexError('Window %r out of range' % win_ix)
+        start_ix = win_ix * self.n_win_disp
+        return slice(start_ix, start_ix + self.n_win_len)
+
+    def time_index(self, win_ix):
+        """Return the (read-only) time index of the win_ix-th window"""
+        return self.time_index_[self.window_slice(win_ix)]
+
+    def window(self, signal, win_ix):
+        """
+        Return the win_ix-th window of signal
+
+        Slicing an in-memory numpy.ndarray returns a view, other array-like
+        storage (e.g. h5py.Dataset) is read on demand. Windows containing
+        NaNs are copied before the NaNs are replaced with the channel mean,
+        so the cached signal is never modified.
+        """
+        win = signal[self.window_slice(win_ix), :]
+
+        nan_idx = np.nonzero(np.isnan(win))
+        if len(nan_idx[0]):
+            if isinstance(signal, np.ndarray):
+                win = win.copy()
+            win[nan_idx[0], nan_idx[1]] = np.nanmean(win[:, nan_idx[1]],
+                                                     axis=0)
+
+        return win
+
+    def signal_packet(self, signal, node_index, win_ix):
+        """Format the win_ix-th window of signal as a signal_packet"""
+        signal_packet = {}
+        signal_packet['data'] = self.window(signal, win_ix)
+        signal_packet['meta'] = \
+            {'ax_0':
+             {'label': 'Time (sec)',
+              'index': self.time_index(win_ix)},
+             'ax_1':
+             {'label': 'Nodes',
+              'index': node_index}
+             }
+
+        return signal_packet
+
+    def iter_signal_packet(self, signal, node_index):
+        """Yield every window of signal as a signal_packet"""
+        for win_ix in xrange(self.n_win):
+            yield self.signal_packet(signal, node_index, win_ix)
@@ -5,10 +5,13 @@ Created by: Ankit Khambhati
 
 Change Log
 ----------
+2026/10/18 - Sparse matrices are stored as variable-length COO triplets
+2026/10/18 - Arrays are stored in their own dtype rather than as float64
 2016/03/06 - Implemented SaveHDF pipe
 """
 
 import numpy as np
+import scipy.sparse as sp
 import h5py
 
 from ..display import my_display
@@ -20,6 +23,11 @@ class SaveHDF(LoggerPipe):
     """
     Save pipeline payload as an HDF
 
+    Numeric arrays are stored in the dtype they arrive in, so a float32
+    pipeline writes float32 datasets. Sparse matrices are stored as a group
+    of variable-length row, col and value datasets, one entry per window,
+    alongside their shape.
+
     Parameters
     ----------
         path: str
@@ -81,11 +89,39 @@ class SaveHDF(LoggerPipe):
                         dset.resize(dset.shape[0]+1, axis=0)
                         dset[-1, 0] = value
 
+                    if sp.issparse(value):
+                        value = value.tocoo()
+                        dgrp = df.require_group(key)
+                        for name, arr in [('row', value.row),
+                                          ('col', value.col),
+                                          ('value', value.data)]:
+                            try:
+                                dset = dgrp[name]
+                            except KeyError:
+                                dt = h5py.special_dtype(vlen=arr.dtype)
+                                dset = dgrp.require_dataset(
+                                    name,
+                                    (0,),
+                                    dt,
+                                    maxshape=(None,))
+                            dset.resize(dset.shape[0]+1, axis=0)
+                            dset[-1] = arr
+                        try:
+                            dset = dgrp['shape']
+                        except KeyError:
+                            dset = dgrp.require_dataset(
+                                'shape',
+                                (0, 2),
+                                np.int,
+                                maxshape=(None, 2))
+                        dset.resize(dset.shape[0]+1, axis=0)
+                        dset[-1, :] = value.shape
+
                     if type(value) is np.ndarray:
                         if type(value[0]) is np.string_:
                             dt = h5py.special_dtype(vlen=unicode)
                         else:
-                            dt = np.float
+                            dt = value.dtype
                         try:
                             dset = df[key]
                         except KeyError:
@@ -5,18 +5,32 @@ Created by: Ankit Khambhati
 
 Change Log
 ----------
+2026/10/18 - SyncCentral removes nodes in batches bounded by memory
+2026/10/18 - DegrCentral and EvecCentral accept sparse adjacency matrices
+2026/10/18 - Pipes accept condensed adjacency matrices
+2026/10/18 - Pipes consume band-stacked adjacency matrices in one call
 2016/03/10 - Implemented DegrCentral, EvecCentral, SyncCentral pipes
 """
 
 from __future__ import division
 import numpy as np
+import scipy.sparse as sp
 
 from ..base import NodeTopoPipe
+from ..graphtools import (adjacency, degree, synchronizability,
+                          leading_eigvec)
+
+# Memory budget of one batch of node-removed adjacency matrices (bytes)
+_BATCH_BYTES = 64 * 2**20
 
 
 class DegrCentral(NodeTopoPipe):
     """
     DegrCentral class for computing weighted degree centrality of the nodes
+
+    Adjacency matrices with a leading band axis yield one centrality vector
+    per band. Condensed and sparse adjacency matrices are summed without
+    expanding.
     """
 
     def __init__(self):
@@ -25,9 +39,8 @@ class DegrCentral(NodeTopoPipe):
     def _pipe_as_flow(self, signal_packet):
         # Get signal_packet details
         hkey = signal_packet.keys()[0]
-        adj = signal_packet[hkey]['data']
 
-        centrality = np.sum(adj, axis=0).reshape(-1, 1)
+        centrality = degree(signal_packet)[..., np.newaxis]
 
         # Dump into signal_packet
         new_packet = {}
@@ -38,6 +51,9 @@ class DegrCentral(NodeTopoPipe):
                 'time': signal_packet[hkey]['meta']['time']
             }
         }
+        if 'band' in signal_packet[hkey]['meta']:
+            new_packet[hkey]['meta']['band'] = \
+                signal_packet[hkey]['meta']['band']
 
         return new_packet
 
@@ -45,6 +61,9 @@ class DegrCentral(NodeTopoPipe):
 class EvecCentral(NodeTopoPipe):
     """
     EvecCentral class for computing eigenvector centrality of the nodes
+
+    Adjacency matrices with a leading band axis are solved as one batch.
+    Sparse adjacency matrices are solved by Lanczos iteration.
     """
 
     def __init__(self):
@@ -53,21 +72,18 @@ class EvecCentral(NodeTopoPipe):
     def _pipe_as_flow(self, signal_packet):
         # Get signal_packet details
         hkey = signal_packet.keys()[0]
-        adj = signal_packet[hkey]['data']
+        adj = adjacency(signal_packet, allow_sparse=True)
 
         # Add 1s along the diagonal to make positive definite
-        adj[np.diag_indices_from(adj)] = 1
-
-        # Compute eigenvalues and eigenvectors, ensure they are real
-        eigval, eigvec = np.linalg.eig(adj)
-        eigval = np.real(eigval)
-        eigvec = np.real(eigvec)
+        if sp.issparse(adj):
+            adj = (adj - sp.diags(adj.diagonal()) +
+                   sp.identity(adj.shape[0])).tocsr()
+        else:
+            diag_ix = np.arange(adj.shape[-1])
+            adj[..., diag_ix, diag_ix] = 1
 
-        # Sort largest to smallest eigenvalue
-        sorted_idx = np.argsort(eigval)[::-1]
-        largest_idx = sorted_idx[0]
-        centrality = np.abs(eigvec[:, largest_idx])
-        centrality = centrality.reshape(-1, 1)
+        # Eigenvector of the largest eigenvalue
+        centrality = leading_eigvec(adj)[..., np.newaxis]
 
         # Dump into signal_packet
         new_packet = {}
@@ -78,6 +94,9 @@ class EvecCentral(NodeTopoPipe):
                 'time': signal_packet[hkey]['meta']['time']
             }
         }
+        if 'band' in signal_packet[hkey]['meta']:
+            new_packet[hkey]['meta']['band'] = \
+                signal_packet[hkey]['meta']['band']
 
         return new_packet
 
@@ -86,46 +105,40 @@ class SyncCentral(NodeTopoPipe):
     """
     SyncCentral class for computing synchronizing/desynchronizing centrality
     of the nodes
+
+    The synchronizability of the network with each node removed is solved
+    in batches of eigenvalue problems, across bands as well when the
+    adjacency matrices have a leading band axis. Each batch of node-removed
+    adjacency matrices is bounded by a memory budget.
     """
 
     def __init__(self):
         self = self
 
     def _pipe_as_flow(self, signal_packet):
-        def global_sync(adj_matr):
-            """Compute synchronizability"""
-
-            # Get the degree vector of the adj
-            deg_vec = np.sum(adj_matr, axis=0)
-            deg_matr = np.diag(deg_vec)
-
-            # Laplacian
-            lapl = deg_matr - adj_matr
-
-            # Compute eigenvalues and eigenvectors, ensure they are real
-            eigval, eigvec = np.linalg.eig(lapl)
-            eigval = np.real(eigval)
-
-            # Sort smallest to largest eigenvalue
-            eigval = np.sort(eigval)
-            sync = np.abs(eigval[1] / eigval[-1]).reshape(1, 1)
-
-            return sync
-
         # Get signal_packet details
         hkey = signal_packet.keys()[0]
-        adj = signal_packet[hkey]['data']
-
-        centrality = []
-        base_sync = global_sync(adj)
-        for node_r in np.arange(adj.shape[0]):
-            adj_mod = adj.copy()
-            adj_mod = np.delete(adj_mod, (node_r), axis=0)
-            adj_mod = np.delete(adj_mod, (node_r), axis=1)
-
-            mod_sync = global_sync(adj_mod)
-            centrality.append((mod_sync-base_sync) / base_sync)
-        centrality = np.array(centrality).reshape(-1, 1)
+        adj = adjacency(signal_packet)
+        n_node = adj.shape[-1]
+
+        # Node indices kept when each node is removed, [n_node x n_node-1]
+        keep_ix = np.array([np.delete(np.arange(n_node), node_r)
+                            for node_r in np.arange(n_node)])
+
+        # Batches of removed nodes within the memory budget
+        n_batch = max(1, int(_BATCH_BYTES //
+                             (adj.itemsize * (adj.size // n_node**2) *
+                              (n_node-1)**2)))
+        mod_sync = []
+        for batch_start in xrange(0, n_node, n_batch):
+            batch_ix = keep_ix[batch_start:batch_start+n_batch]
+            mod_sync.append(synchronizability(
+                adj[..., batch_ix[:, :, np.newaxis],
+                    batch_ix[:, np.newaxis, :]]))
+        mod_sync = np.concatenate(mod_sync, axis=-1)
+
+        base_sync = synchronizability(adj)[..., np.newaxis]
+        centrality = ((mod_sync-base_sync) / base_sync)[..., np.newaxis]
 
         # Dump into signal_packet
         new_packet = {}
@@ -136,5 +149,8 @@ class SyncCentral(NodeTopoPipe):
                 'time': signal_packet[hkey]['meta']['time']
             }
         }
+        if 'band' in signal_packet[hkey]['meta']:
+            new_packet[hkey]['meta']['band'] = \
+                signal_packet[hkey]['meta']['band']
 
         return new_packet
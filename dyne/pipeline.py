@@ -6,9 +6,11 @@ Created by: Ankit Khambhati
 
 Change Log
 ----------
+2026/10/18 - Optional DTYPE sets the floating point precision of every pipe
 2016/03/08 - Established the BasePipe
 """
 
+import numpy as np
 import pandas as pd
 import json
 import h5py
@@ -57,7 +59,9 @@ class Pipeline(object):
     Parameters
     ----------
         pipe_defs_json: str [JSON File]
-            JSON file defining the pipes that will be instantiated
+            JSON file defining the pipes that will be instantiated, with an
+            optional DTYPE (e.g. "float32", default "float64") setting the
+            floating point precision of the data yielded by every pipe
 
         pipeline_def_json: str [JSON File]
             JSON file defining the pipeline architecture that will be executed
@@ -86,6 +90,7 @@ class Pipeline(object):
         errors.check_type(pipe_defs['FLOW'], list)
         errors.check_type(pipe_defs['LOG'], dict)
         errors.check_path(pipe_defs['LOG']['PATH'], exist=False)
+        self.dtype = np.dtype(pipe_defs.get('DTYPE', 'float64'))
 
         # Combine all pipes for initialization
         all_pipes = [pipe_defs['SOURCE']]
@@ -99,6 +104,7 @@ class Pipeline(object):
             module = importlib.import_module(pipe['PIPE_MODULE'])
             cls = getattr(module, pipe['PIPE_CLASS'])
             inst = cls(**pipe['PIPE_PARAM'])
+            inst.set_dtype(self.dtype)
             self.pipes[pipe['PIPE_NAME']] = inst
         self.pipes['None'] = None
 
@@ -0,0 +1,95 @@
+"""
+Artifact pipes for rejecting contaminated windows
+
+Created by: Ankit Khambhati
+
+Change Log
+----------
+2026/10/18 - Implemented ArtifactReject pipe
+"""
+
+from __future__ import division
+import numpy as np
+
+from ..display import my_display
+from ..errors import check_type
+from ..base import PreprocPipe
+
+
+class ArtifactReject(PreprocPipe):
+    """
+    ArtifactReject pipe for dropping windows contaminated by artifacts
+
+    Each channel of the window is screened against every enabled criterion
+    at once. If more than max_bad_node channels fail, the window is dropped,
+    so no downstream pipe processes it, and the rejection is logged.
+    Otherwise the signal_packet passes through unchanged.
+
+    Parameters
+    ----------
+        amp_thresh: float or None
+            Maximum absolute deviation from the channel mean
+
+        ll_thresh: float or None
+            Maximum line-length, the mean absolute difference between
+            consecutive samples
+
+        flat_thresh: float or None
+            Minimum peak-to-peak amplitude, below which a channel is flat
+
+        max_bad_node: int
+            Number of failing channels tolerated before the window is dropped
+    """
+
+    def __init__(self, amp_thresh=None, ll_thresh=None, flat_thresh=None,
+                 max_bad_node=0):
+        # Standard param checks
+        for thresh in [amp_thresh, ll_thresh, flat_thresh]:
+            if thresh is not None:
+                check_type(thresh, float)
+        check_type(max_bad_node, int)
+        if max_bad_node < 0:
+            raise ValueError('max_bad_node cannot be negative')
+
+        # Assign to instance
+        self.amp_thresh = amp_thresh
+        self.ll_thresh = ll_thresh
+        self.flat_thresh = flat_thresh
+        self.max_bad_node = max_bad_node
+
+    def _pipe_as_flow(self, signal_packet):
+        # Get signal_packet details
+        hkey = signal_packet.keys()[0]
+        ax_0_ix = signal_packet[hkey]['meta']['ax_0']['index']
+        data = signal_packet[hkey]['data']
+
+        # Screen all channels against each criterion
+        bad_node = {}
+        if self.amp_thresh is not None:
+            bad_node['amplitude'] = np.max(
+                np.abs(data - data.mean(axis=-2, keepdims=True)),
+                axis=-2) > self.amp_thresh
+        if self.ll_thresh is not None:
+            bad_node['line-length'] = np.mean(
+                np.abs(np.diff(data, axis=-2)), axis=-2) > self.ll_thresh
+        if self.flat_thresh is not None:
+            bad_node['flatline'] = np.ptp(data, axis=-2) < self.flat_thresh
+        if not bad_node:
+            return signal_packet
+
+        # Count channels failing any criterion, over all bands if present
+        def n_bad(bad):
+            return np.sum(np.any(bad.reshape(-1, bad.shape[-1]), axis=0))
+
+        n_bad_node = n_bad(np.array(bad_node.values()))
+        if n_bad_node <= self.max_bad_node:
+            return signal_packet
+
+        reason = ', '.join(['%s: %d' % (crit, n_bad(bad))
+                            for crit, bad in sorted(bad_node.items())
+                            if np.any(bad)])
+        my_display('\nArtifactReject: dropped window %.3f-%.3f sec '
+                   '(%d bad nodes; %s)' %
+                   (ax_0_ix[0], ax_0_ix[-1], n_bad_node, reason))
+
+        return None
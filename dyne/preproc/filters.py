@@ -5,15 +5,24 @@ Created by: Ankit Khambhati
 
 Change Log
 ----------
+2026/10/18 - Filters, CommonAvgRef and PreWhiten process band-stacked signals
+2026/10/18 - Implemented FilterBank pipe
+2026/10/18 - Implemented LineNoiseFilter pipe
+2026/10/18 - CommonAvgRef subtracts the average in place
+2026/10/18 - Vectorized PreWhiten across channels and added AR(p) order
+2026/10/18 - Added causal streaming mode to EllipticFilter
+2026/10/18 - EllipticFilter caches its design and filters in SOS form
 2016/03/06 - Implemented EllipticFilter, CommonAvgRef, Prewhiten pipes
 """
 
 from __future__ import division
 import numpy as np
 import scipy.signal as spsig
+from scipy.fftpack import next_fast_len
 
 from ..errors import check_type
 from ..base import PreprocPipe
+from ..sigtools import sample_frequency, SOSStream
 
 
 class EllipticFilter(PreprocPipe):
@@ -22,6 +31,17 @@ class EllipticFilter(PreprocPipe):
 
     This class implements zero-phase filtering to pre-process and analyze
     frequency-dependent network structure. Implements Elliptic IIR filter.
+    The filter is designed once per sampling frequency and applied as
+    second-order sections, which remain stable at high orders.
+
+    In streaming mode the filter is causal instead: only the samples new
+    since the previous window are filtered, the filter state is carried
+    across windows, and each window is assembled from a buffer of filtered
+    samples. This avoids re-filtering overlapping samples and the edge
+    transients of filtering each window separately, at the cost of the
+    phase delay of a causal filter.
+
+    Signals with a leading band axis are filtered band by band.
 
     Parameters
     ----------
@@ -36,14 +56,19 @@ class EllipticFilter(PreprocPipe):
 
         As: float
             Stop band minimum attenuation (dB)
+
+        stream: bool
+            Filter causally across consecutive windows instead of zero-phase
+            within each window
     """
 
-    def __init__(self, Wp, Ws, Rp, As):
+    def __init__(self, Wp, Ws, Rp, As, stream=False):
         # Standard param checks
         check_type(Wp, list)
         check_type(Ws, list)
         check_type(Rp, float)
         check_type(As, float)
+        check_type(stream, bool)
         if not len(Wp) == len(Ws):
             raise Exception('Frequency criteria mismatch for Wp \
                             and Ws')
@@ -56,27 +81,243 @@ class EllipticFilter(PreprocPipe):
         self.Ws = Ws
         self.Rp = Rp
         self.As = As
+        self.stream = stream
+
+        # Filter designs keyed by (fs, Wp, Ws, Rp, As)
+        self.sos_cache_ = {}
+        self.stream_ = None
+
+    def _get_sos(self, fs):
+        """Return the second-order sections of the filter at fs"""
+        design_key = (fs, tuple(self.Wp), tuple(self.Ws), self.Rp, self.As)
+        if design_key not in self.sos_cache_:
+            nyq = fs / 2.0
+            wp_nyq = map(lambda f: f/nyq, self.Wp)
+            ws_nyq = map(lambda f: f/nyq, self.Ws)
+            self.sos_cache_[design_key] = spsig.iirdesign(wp=wp_nyq,
+                                                          ws=ws_nyq,
+                                                          gpass=self.Rp,
+                                                          gstop=self.As,
+                                                          analog=0,
+                                                          ftype='ellip',
+                                                          output='sos')
+
+        return self.sos_cache_[design_key]
 
     def _pipe_as_flow(self, signal_packet):
         # Get signal_packet details
         hkey = signal_packet.keys()[0]
         ax_0_ix = signal_packet[hkey]['meta']['ax_0']['index']
-        fs = np.int(np.mean(1./np.diff(ax_0_ix)))
-
-        # Compute filter coefficients
-        nyq = fs / 2.0
-        wp_nyq = map(lambda f: f/nyq, self.Wp)
-        ws_nyq = map(lambda f: f/nyq, self.Ws)
-        coef_b, coef_a = spsig.iirdesign(wp=wp_nyq,
-                                         ws=ws_nyq,
-                                         gpass=self.Rp,
-                                         gstop=self.As,
-                                         analog=0, ftype='ellip',
-                                         output='ba')
+        fs = sample_frequency(ax_0_ix)
+
+        sos = self._get_sos(fs)
 
         # Perform filtering and dump into signal_packet
-        signal_packet[hkey]['data'] = spsig.filtfilt(
-            coef_b, coef_a, signal_packet[hkey]['data'], axis=0)
+        if self.stream:
+            if (self.stream_ is None) or (self.stream_.sos is not sos):
+                self.stream_ = SOSStream(sos)
+            signal_packet[hkey]['data'] = self.stream_.filter_window(
+                signal_packet[hkey]['data'], ax_0_ix)
+        else:
+            signal_packet[hkey]['data'] = spsig.sosfiltfilt(
+                sos, signal_packet[hkey]['data'], axis=-2)
+
+        return signal_packet
+
+
+class LineNoiseFilter(PreprocPipe):
+    """
+    LineNoiseFilter pipe for removing line noise and its harmonics
+
+    This class implements a comb of second-order IIR notch filters, one at
+    the line frequency and one at each harmonic below Nyquist, stacked as
+    second-order sections. The comb is designed once per sampling frequency
+    and applied to the window in a single zero-phase pass.
+
+    Parameters
+    ----------
+        line_frequency: float
+            Fundamental frequency of the line noise (Hz)
+
+        n_harmonic: int
+            Number of harmonics removed in addition to the fundamental
+
+        quality: float
+            Quality factor of each notch (center frequency / bandwidth)
+
+        stream: bool
+            Filter causally across consecutive windows instead of zero-phase
+            within each window (see EllipticFilter)
+    """
+
+    def __init__(self, line_frequency, n_harmonic, quality, stream=False):
+        # Standard param checks
+        check_type(line_frequency, float)
+        check_type(n_harmonic, int)
+        check_type(quality, float)
+        check_type(stream, bool)
+        if n_harmonic < 0:
+            raise ValueError('n_harmonic cannot be negative')
+
+        # Assign to instance
+        self.line_frequency = line_frequency
+        self.n_harmonic = n_harmonic
+        self.quality = quality
+        self.stream = stream
+
+        # Comb designs keyed by (fs, line_frequency, n_harmonic, quality)
+        self.sos_cache_ = {}
+        self.stream_ = None
+
+    def _get_sos(self, fs):
+        """Return the notch comb at fs as second-order sections"""
+        design_key = (fs, self.line_frequency, self.n_harmonic, self.quality)
+        if design_key not in self.sos_cache_:
+            nyq = fs / 2.0
+            notch_freq = self.line_frequency * \
+                np.arange(1, self.n_harmonic+2)
+            notch_freq = notch_freq[notch_freq < nyq]
+            if len(notch_freq) == 0:
+                raise ValueError('Line frequency must be below Nyquist')
+
+            sos = []
+            for freq in notch_freq:
+                coef_b, coef_a = spsig.iirnotch(freq/nyq, self.quality)
+                sos.append(np.hstack((coef_b, coef_a)))
+            self.sos_cache_[design_key] = np.array(sos)
+
+        return self.sos_cache_[design_key]
+
+    def _pipe_as_flow(self, signal_packet):
+        # Get signal_packet details
+        hkey = signal_packet.keys()[0]
+        ax_0_ix = signal_packet[hkey]['meta']['ax_0']['index']
+        fs = sample_frequency(ax_0_ix)
+
+        sos = self._get_sos(fs)
+
+        # Perform filtering and dump into signal_packet
+        if self.stream:
+            if (self.stream_ is None) or (self.stream_.sos is not sos):
+                self.stream_ = SOSStream(sos)
+            signal_packet[hkey]['data'] = self.stream_.filter_window(
+                signal_packet[hkey]['data'], ax_0_ix)
+        else:
+            signal_packet[hkey]['data'] = spsig.sosfiltfilt(
+                sos, signal_packet[hkey]['data'], axis=-2)
+
+        return signal_packet
+
+
+class FilterBank(PreprocPipe):
+    """
+    FilterBank pipe for splitting the signal into several frequency bands
+
+    This class applies one Elliptic IIR filter per band, with the same
+    criteria as EllipticFilter, to the window in a single vectorized pass.
+    The window is reflection padded and transformed once. The zero-phase
+    (squared magnitude) response of every band is then applied in the
+    frequency domain and all bands are inverse transformed together. The
+    band responses are cached per sampling frequency and FFT length, and the
+    FFT length is padded to a fast size.
+
+    The yielded signal_packet gains a leading band axis, data has shape
+    [n_band x n_sample x n_node], and is described by meta['band'] whose
+    index holds the [low, high] cutoffs of each band. A signal that already
+    has a band axis cannot be split again.
+
+    Parameters
+    ----------
+        bands: list
+            Pass bands as [low, high] frequency pairs (Hz); a low cutoff of
+            0 gives a lowpass band
+
+        trans_width: float
+            Width of the transition band on each side of a pass band (Hz)
+
+        Rp: float
+            Pass band maximum loss (dB)
+
+        As: float
+            Stop band minimum attenuation (dB)
+    """
+
+    def __init__(self, bands, trans_width, Rp, As):
+        # Standard param checks
+        check_type(bands, list)
+        check_type(trans_width, float)
+        check_type(Rp, float)
+        check_type(As, float)
+        for band in bands:
+            check_type(band, list)
+            if not len(band) == 2:
+                raise Exception('Each band must be a [low, high] pair')
+            if not (0 <= band[0] < band[1]):
+                raise Exception('Band cutoffs must satisfy 0 <= low < high')
+            if (band[0] > 0) and (band[0] - trans_width <= 0):
+                raise Exception('Transition band extends below 0 Hz')
+
+        # Assign to instance
+        self.bands = bands
+        self.trans_width = trans_width
+        self.Rp = Rp
+        self.As = As
+
+        # Band responses keyed by (fs, n_fft)
+        self.gain_cache_ = {}
+
+    def _get_gain(self, fs, n_fft):
+        """Return the zero-phase gain of every band on the rfft grid"""
+        design_key = (fs, n_fft)
+        if design_key not in self.gain_cache_:
+            nyq = fs / 2.0
+            freq = np.fft.rfftfreq(n_fft, d=1./fs)
+
+            gain = []
+            for band in self.bands:
+                if band[0] == 0:
+                    wp = [band[1]/nyq]
+                    ws = [(band[1]+self.trans_width)/nyq]
+                else:
+                    wp = [band[0]/nyq, band[1]/nyq]
+                    ws = [(band[0]-self.trans_width)/nyq,
+                          (band[1]+self.trans_width)/nyq]
+                sos = spsig.iirdesign(wp=wp, ws=ws,
+                                      gpass=self.Rp, gstop=self.As,
+                                      analog=0, ftype='ellip',
+                                      output='sos')
+                resp = spsig.sosfreqz(sos, worN=2*np.pi*freq/fs)[1]
+                gain.append(np.abs(resp)**2)
+            self.gain_cache_[design_key] = np.array(gain)[:, :, np.newaxis]
+
+        return self.gain_cache_[design_key]
+
+    def _pipe_as_flow(self, signal_packet):
+        # Get signal_packet details
+        hkey = signal_packet.keys()[0]
+        ax_0_ix = signal_packet[hkey]['meta']['ax_0']['index']
+        data = signal_packet[hkey]['data']
+        fs = sample_frequency(ax_0_ix)
+        if 'band' in signal_packet[hkey]['meta']:
+            raise ValueError('FilterBank cannot split a signal that already' +
+                             ' has a band axis')
+
+        # Reflect the window edges to limit wrap-around transients
+        n_sample = data.shape[0]
+        n_pad = n_sample // 2
+        n_fft = next_fast_len(n_sample + 2*n_pad)
+        data_pad = np.pad(data, ((n_pad, n_pad), (0, 0)), mode='reflect')
+
+        # One forward transform, then all bands inverse transformed at once
+        data_fft = np.fft.rfft(data_pad, n=n_fft, axis=0)
+        data_band = np.fft.irfft(self._get_gain(fs, n_fft) * data_fft,
+                                 n=n_fft, axis=1)[:, n_pad:n_pad+n_sample, :]
+
+        # Dump into signal_packet
+        signal_packet[hkey]['data'] = data_band
+        signal_packet[hkey]['meta']['band'] = {
+            'label': 'Frequency band (Hz)',
+            'index': np.array(self.bands, dtype=np.float)}
 
         return signal_packet
 
@@ -85,6 +326,7 @@ class CommonAvgRef(PreprocPipe):
     """
     CommonAvgRef pipe for removing the common-average from the signal
 
+    Signals with a leading band axis are referenced band by band.
     """
 
     def __init__(self):
@@ -96,7 +338,7 @@ class CommonAvgRef(PreprocPipe):
 
         # Compute common average reference
         data = signal_packet[hkey]['data']
-        data = (data.T - data.mean(axis=1)).T
+        data -= data.mean(axis=-1, keepdims=True)
 
         # Dump into signal_packet
         signal_packet[hkey]['data'] = data
@@ -104,31 +346,101 @@ class CommonAvgRef(PreprocPipe):
         return signal_packet
 
 
+def _levinson_durbin(autocov):
+    """
+    Solve the Yule-Walker equations of every channel at once
+
+    Parameters
+    ----------
+        autocov: numpy.ndarray, shape: [order+1 x ... x n_node]
+            Autocovariance at lags 0 to order for each channel
+
+    Returns
+    -------
+        ar_coef: numpy.ndarray, shape: [order x ... x n_node]
+            AR coefficients for lags 1 to order for each channel
+    """
+
+    order = autocov.shape[0] - 1
+    ar_coef = np.zeros((order,) + autocov.shape[1:])
+    pred_err = autocov[0].copy()
+    for m in xrange(order):
+        numer = autocov[m+1] - np.sum(ar_coef[:m] * autocov[m:0:-1], axis=0)
+
+        # Channels without variance are left with zero coefficients
+        with np.errstate(divide='ignore', invalid='ignore'):
+            refl = np.where(pred_err > 0, numer / pred_err, 0.)
+
+        ar_coef[:m] = ar_coef[:m] - refl * ar_coef[:m][::-1]
+        ar_coef[m] = refl
+        pred_err *= (1 - refl**2)
+
+    return ar_coef
+
+
 class PreWhiten(PreprocPipe):
     """
     PreWhiten pipe for removing autocorrelative structure from each signal
 
-    Implements an AR(1) filter and passes forth the residuals
+    Implements an AR(p) filter and passes forth the residuals. All channels
+    are fit at once: AR(1) by closed-form least squares with an intercept,
+    higher orders by the Yule-Walker equations solved with Levinson-Durbin
+    recursion. The first p samples of the window are consumed by the fit.
+    Signals with a leading band axis are fit band by band.
+
+    Parameters
+    ----------
+        order: int
+            Order p of the autoregressive model
     """
 
-    def __init__(self):
-        self = self
+    def __init__(self, order=1):
+        # Standard param checks
+        check_type(order, int)
+        if order < 1:
+            raise ValueError('order must be at least 1')
+
+        # Assign to instance
+        self.order = order
 
     def _pipe_as_flow(self, signal_packet):
         # Get signal_packet details
         hkey = signal_packet.keys()[0]
         ax_0_ix = signal_packet[hkey]['meta']['ax_0']['index']
         data = signal_packet[hkey]['data']
-
-        win_white = np.zeros((data.shape[0]-1,
-                              data.shape[1]))
-        for i in xrange(data.shape[1]):
-            win_x = np.vstack((data[:-1, i],
-                               np.ones(data.shape[0]-1)))
-            w = np.linalg.lstsq(win_x.T, data[1:, i])[0]
-            win_white[:, i] = data[1:, i] - (data[:-1, i]*w[0] + w[1])
-
-        ax_0_ix = ax_0_ix[1:]
+        if data.shape[-2] <= self.order:
+            raise ValueError('Window is too short for an AR(%d) fit' %
+                             self.order)
+
+        if self.order == 1:
+            # Least squares fit of x[t] = w0*x[t-1] + w1 for all channels
+            prev_dev = data[..., :-1, :] - \
+                data[..., :-1, :].mean(axis=-2, keepdims=True)
+            next_dev = data[..., 1:, :] - \
+                data[..., 1:, :].mean(axis=-2, keepdims=True)
+            prev_var = np.sum(prev_dev**2, axis=-2, keepdims=True)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                w0 = np.where(prev_var > 0,
+                              np.sum(prev_dev*next_dev, axis=-2,
+                                     keepdims=True) / prev_var,
+                              0.)
+            win_white = next_dev - w0*prev_dev
+        else:
+            # Yule-Walker fit on the demeaned signal
+            data_dev = data - data.mean(axis=-2, keepdims=True)
+            n_sample = data_dev.shape[-2]
+            autocov = np.array(
+                [np.sum(data_dev[..., lag:, :] *
+                        data_dev[..., :n_sample-lag, :], axis=-2)
+                 for lag in xrange(self.order+1)]) / n_sample
+            ar_coef = _levinson_durbin(autocov)
+
+            win_white = data_dev[..., self.order:, :].copy()
+            for lag in xrange(1, self.order+1):
+                win_white -= (ar_coef[lag-1][..., np.newaxis, :] *
+                              data_dev[..., self.order-lag:n_sample-lag, :])
+
+        ax_0_ix = ax_0_ix[self.order:]
 
         # Dump into signal_packet
         signal_packet[hkey]['data'] = win_white
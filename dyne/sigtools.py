@@ -0,0 +1,203 @@
+"""
+Signal utilities shared by the pipes
+
+Created by: Ankit Khambhati
+
+Change Log
+----------
+2026/10/18 - SOSStream folds leading axes (e.g. bands) into the channels
+2026/10/18 - Added RingBuffer, new_sample_start and SOSStream for streaming
+2026/10/18 - Added sample_frequency
+"""
+
+from __future__ import division
+import numpy as np
+import scipy.signal as spsig
+
+
+def sample_frequency(time_index):
+    """
+    Sampling frequency of a uniformly sampled time index
+
+    Uses only the end points of the index, so the cost does not grow with
+    the window length. The estimate is rounded to a micro-Hertz so windows
+    cut from the same signal report an identical frequency.
+
+    Parameters
+    ----------
+        time_index: numpy.ndarray
+            Time stamp (sec) for each sample
+
+    Returns
+    -------
+        fs: float
+            Sampling frequency (Hz)
+    """
+
+    if len(time_index) < 2:
+        raise ValueError('Need at least two time stamps to derive a' +
+                         ' sampling frequency')
+    duration = time_index[-1] - time_index[0]
+    if not duration > 0:
+        raise ValueError('Time stamps must be increasing')
+
+    return float(np.round((len(time_index) - 1) / duration, 6))
+
+
+def new_sample_start(time_index, last_time):
+    """
+    Locate the samples of a window that arrived after last_time
+
+    Parameters
+    ----------
+        time_index: numpy.ndarray
+            Time stamp (sec) for each sample of the current window
+
+        last_time: float or None
+            Time stamp of the newest sample already consumed
+
+    Returns
+    -------
+        start_ix: int or None
+            Index of the first new sample in the window, or None if the
+            window does not continue the stream (first window, a gap between
+            windows, or a jump backwards in time)
+    """
+
+    if last_time is None:
+        return None
+
+    start_ix = np.searchsorted(time_index, last_time, side='right')
+    if start_ix == 0:
+        return None
+
+    # The window must contain the last consumed sample itself
+    sample_period = (time_index[-1] - time_index[0]) / (len(time_index) - 1)
+    if np.abs(time_index[start_ix-1] - last_time) > 0.5*sample_period:
+        return None
+
+    return int(start_ix)
+
+
+def fold_leading(data):
+    """
+    Fold any leading axes of a window into its channels
+
+    [... x n_sample x n_node] -> [n_sample x (... * n_node)], so a stream
+    of band-stacked windows is processed as one stream of more channels.
+    """
+
+    return np.rollaxis(data, data.ndim-2).reshape(data.shape[-2], -1)
+
+
+def unfold_leading(data, shape):
+    """Restore the leading axes of a window of shape folded by fold_leading"""
+    data = data.reshape((data.shape[0],) + shape[:-2] + (shape[-1],))
+    return np.rollaxis(data, 0, data.ndim-1)
+
+
+class RingBuffer(object):
+    """
+    RingBuffer holding the most recent samples of a stream along axis 0
+
+    Parameters
+    ----------
+        n_sample: int
+            Number of samples retained
+
+        n_node: int
+            Number of channels in each sample
+
+        dtype: numpy.dtype
+            Data type of the buffer
+    """
+
+    def __init__(self, n_sample, n_node, dtype=np.float64):
+        self.n_sample = n_sample
+        self.n_node = n_node
+        self.buffer_ = np.zeros((n_sample, n_node), dtype=dtype)
+        self.write_ix_ = 0
+        self.n_filled_ = 0
+
+    def extend(self, data):
+        """Append samples, overwriting the oldest ones"""
+        data = data[-self.n_sample:]
+        n_new = data.shape[0]
+
+        n_head = min(n_new, self.n_sample - self.write_ix_)
+        self.buffer_[self.write_ix_:self.write_ix_+n_head] = data[:n_head]
+        self.buffer_[:n_new-n_head] = data[n_head:]
+
+        self.write_ix_ = (self.write_ix_ + n_new) % self.n_sample
+        self.n_filled_ = min(self.n_filled_ + n_new, self.n_sample)
+
+    def latest(self, n_sample):
+        """Return a copy of the n_sample most recent samples, oldest first"""
+        if n_sample > self.n_filled_:
+            raise ValueError('Only %d samples buffered' % self.n_filled_)
+        start_ix = self.write_ix_ - n_sample
+        if start_ix >= 0:
+            return self.buffer_[start_ix:self.write_ix_].copy()
+        return np.concatenate((self.buffer_[start_ix:],
+                               self.buffer_[:self.write_ix_]), axis=0)
+
+
+class SOSStream(object):
+    """
+    SOSStream for causal filtering of a stream of overlapping windows
+
+    Only the samples that are new since the previous window are filtered.
+    The filter state is carried across windows and the filtered samples are
+    kept in a RingBuffer from which each output window is assembled. The
+    stream restarts whenever a window does not continue the previous one.
+
+    Parameters
+    ----------
+        sos: numpy.ndarray, shape: [n_section x 6]
+            Second-order sections of the filter
+    """
+
+    def __init__(self, sos):
+        self.sos = sos
+        self.zi_ = None
+        self.last_time_ = None
+        self.ring_ = None
+
+    def _restart(self, data):
+        """Filter a whole window from a steady state at its first sample"""
+        zi = spsig.sosfilt_zi(self.sos)[:, :, np.newaxis] * data[0]
+        data_filt, self.zi_ = spsig.sosfilt(self.sos, data, axis=0, zi=zi)
+
+        self.ring_ = RingBuffer(data.shape[0], data.shape[1],
+                                dtype=data_filt.dtype)
+        self.ring_.extend(data_filt)
+
+    def filter_window(self, data, time_index):
+        """
+        Return the causally filtered version of a window
+
+        Parameters
+        ----------
+            data: numpy.ndarray, shape: [... x n_sample x n_node]
+                Windowed signal, any leading axes (e.g. bands) are folded
+                into the channels of the stream
+
+            time_index: numpy.ndarray
+                Time stamp (sec) for each sample
+        """
+
+        data_shape = data.shape
+        data = fold_leading(data)
+
+        start_ix = new_sample_start(time_index, self.last_time_)
+        if (start_ix is None) or \
+           (self.ring_.n_sample != data.shape[0]) or \
+           (self.ring_.n_node != data.shape[1]):
+            self._restart(data)
+        elif start_ix < data.shape[0]:
+            data_filt, self.zi_ = spsig.sosfilt(self.sos, data[start_ix:],
+                                                axis=0, zi=self.zi_)
+            self.ring_.extend(data_filt)
+        self.last_time_ = time_index[-1]
+
+        return unfold_leading(self.ring_.latest(data.shape[0]), data_shape)
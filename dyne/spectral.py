@@ -0,0 +1,422 @@
+"""
+Spectral utilities shared by the pipes
+
+Created by: Ankit Khambhati
+
+Change Log
+----------
+2026/10/18 - coherence_matrix accumulates in double for any out dtype
+2026/10/18 - coherence_matrix can accumulate the upper triangle only
+2026/10/18 - Shared spectra are keyed by a token drawn for each yielded window
+2026/10/18 - Segment spectra and coherence_matrix batch leading axes
+2026/10/18 - coherence_matrix can accumulate into a given buffer
+2026/10/18 - Added a per-window spectral cache shared by sibling pipes
+2026/10/18 - Added SegmentCache for reusing segment spectra across windows
+2026/10/18 - coherence_matrix averages over several frequency bands at once
+2026/10/18 - Added segment_spectra
+2026/10/18 - Added coherence_matrix
+2026/10/18 - Added analytic_signal with cached FFT lengths and multipliers
+"""
+
+from __future__ import division
+import numpy as np
+import scipy.signal as spsig
+from scipy.fftpack import next_fast_len
+from numpy.lib.stride_tricks import as_strided
+
+# Hilbert multipliers keyed by window length
+_ANALYTIC_CACHE = {}
+
+
+def _analytic_plan(n_sample):
+    """Return the fast FFT length and Hilbert multiplier for n_sample"""
+    if n_sample not in _ANALYTIC_CACHE:
+        n_fft = next_fast_len(n_sample)
+        mult = np.zeros(n_fft)
+        mult[0] = 1
+        if n_fft % 2 == 0:
+            mult[n_fft // 2] = 1
+            mult[1:n_fft // 2] = 2
+        else:
+            mult[1:(n_fft + 1) // 2] = 2
+        _ANALYTIC_CACHE[n_sample] = (n_fft, mult[:, np.newaxis])
+
+    return _ANALYTIC_CACHE[n_sample]
+
+
+def analytic_signal(signal):
+    """
+    Analytic signal of each channel via the Hilbert transform
+
+    The window is zero padded to a fast FFT length. The FFT length and the
+    Hilbert multiplier are cached and reused for every window of the same
+    length.
+
+    Parameters
+    ----------
+        signal: numpy.ndarray, shape: [... x n_sample x n_node]
+            Windowed signal, any leading axes (e.g. bands) are batched
+
+    Returns
+    -------
+        analytic: numpy.ndarray, shape: [... x n_sample x n_node]
+            Complex analytic signal
+    """
+
+    n_sample = signal.shape[-2]
+    n_fft, mult = _analytic_plan(n_sample)
+
+    signal_fft = np.fft.fft(signal, n=n_fft, axis=-2)
+    signal_fft *= mult
+
+    return np.fft.ifft(signal_fft, axis=-2)[..., :n_sample, :]
+
+
+def coherence_matrix(spec, band_idx=None, out=None, condensed=False):
+    """
+    Magnitude-squared coherence between every pair of channels
+
+    The cross-spectral matrix is formed one frequency at a time, so memory
+    scales as O(n_node^2) regardless of the number of frequencies. When
+    several bands are requested each frequency is transformed once and
+    added to every band containing it.
+
+    Parameters
+    ----------
+        spec: numpy.ndarray, shape: [... x n_freq x n_avg x n_node]
+            Complex spectra of each channel, with the estimates averaged
+            into the cross-spectrum (tapers or segments) along n_avg, any
+            leading axes (e.g. bands) are batched
+
+        band_idx: list or None
+            Indices into n_freq of the frequencies in each band, None
+            averages over all n_freq frequencies
+
+        out: numpy.ndarray or None, shape: [... x n_band x n_node x n_node]
+                                           or [... x n_band x n_edge]
+            Buffer the coherence is written to, one band when band_idx is
+            None, the sum is accumulated in double precision regardless of
+            its dtype
+
+        condensed: bool
+            Accumulate only the upper triangle of each matrix, row by row,
+            so the trailing n_node x n_node axes of out and coh become a
+            single n_node(n_node-1)/2 axis
+
+    Returns
+    -------
+        coh: numpy.ndarray, shape: [... x n_node x n_node] or
+                                   [... x n_band x n_node x n_node]
+            Coherence averaged over the frequencies of each band, with a
+            leading n_band axis only when band_idx is given
+    """
+
+    n_freq, n_node = spec.shape[-3], spec.shape[-1]
+    diag_ix = np.arange(n_node)
+    if band_idx is None:
+        if n_freq == 0:
+            raise ValueError('No frequency bins to average over')
+        weight = np.ones((1, n_freq)) / n_freq
+    else:
+        weight = np.zeros((len(band_idx), n_freq))
+        for band_ix, freq_idx in enumerate(band_idx):
+            if len(freq_idx) == 0:
+                raise ValueError('No frequency bins within band %d' %
+                                 band_ix)
+            weight[band_ix, freq_idx] = 1. / len(freq_idx)
+
+    triu_ix, triu_iy = np.triu_indices(n_node, k=1)
+    coh_shape = (len(triu_ix),) if condensed else (n_node, n_node)
+    if (out is None) or (not out.dtype == np.float64):
+        coh = np.zeros(spec.shape[:-3] + (weight.shape[0],) + coh_shape)
+    else:
+        coh = out
+        coh.fill(0)
+    for freq_ix in np.flatnonzero(weight.any(axis=0)):
+        freq_spec = spec[..., freq_ix, :, :]
+        csd = np.matmul(np.swapaxes(freq_spec, -1, -2), np.conj(freq_spec))
+        psd = np.real(csd[..., diag_ix, diag_ix])
+        if condensed:
+            freq_coh = np.abs(csd[..., triu_ix, triu_iy])**2 / \
+                (psd[..., triu_ix] * psd[..., triu_iy])
+        else:
+            freq_coh = np.abs(csd)**2 / (psd[..., :, np.newaxis] *
+                                         psd[..., np.newaxis, :])
+        band_weight = weight[(slice(None), freq_ix) +
+                             (np.newaxis,)*len(coh_shape)]
+        coh += band_weight * np.expand_dims(freq_coh, -1-len(coh_shape))
+    if (out is not None) and (coh is not out):
+        out[...] = coh
+        coh = out
+
+    if band_idx is None:
+        return coh[..., 0, :, :] if not condensed else coh[..., 0, :]
+    return coh
+
+
+def segment_spectra(signal, fs, window, nperseg, noverlap, freq_range=None):
+    """
+    Welch segment spectra of each channel
+
+    Segments are cut, detrended (constant) and windowed as in
+    scipy.signal.welch and scipy.signal.csd, so cross-spectra formed from
+    these spectra reproduce their estimates.
+
+    Parameters
+    ----------
+        signal: numpy.ndarray, shape: [... x n_sample x n_node]
+            Windowed signal, any leading axes (e.g. bands) are batched
+
+        fs: float
+            Sampling frequency (Hz)
+
+        window: str
+            Window applied to each segment, see scipy.signal.get_window
+
+        nperseg: int
+            Number of samples in each segment
+
+        noverlap: int
+            Number of samples shared by consecutive segments
+
+        freq_range: list or None
+            [low, high] frequencies (Hz) to keep, None keeps all
+
+    Returns
+    -------
+        freq: numpy.ndarray, shape: [n_freq]
+            Frequency (Hz) of each spectral bin
+
+        spec: numpy.ndarray, shape: [... x n_freq x n_segment x n_node]
+            Complex spectrum of each segment of each channel
+    """
+
+    signal = np.ascontiguousarray(signal)
+    step = nperseg - noverlap
+    n_segment = (signal.shape[-2] - noverlap) // step
+    if n_segment < 1:
+        raise ValueError('Signal is shorter than one segment')
+
+    # Segments as a view, [... x n_segment x nperseg x n_node]
+    segment = as_strided(signal,
+                         shape=signal.shape[:-2] + (n_segment, nperseg,
+                                                    signal.shape[-1]),
+                         strides=signal.strides[:-2] +
+                         (step*signal.strides[-2], signal.strides[-2],
+                          signal.strides[-1]))
+    segment = segment - segment.mean(axis=-2, keepdims=True)
+    segment *= spsig.get_window(window, nperseg)[:, np.newaxis]
+
+    freq = np.fft.rfftfreq(nperseg, d=1./fs)
+    if freq_range is None:
+        freq_idx = np.arange(len(freq))
+    else:
+        freq_idx = np.flatnonzero((freq >= freq_range[0]) &
+                                  (freq <= freq_range[1]))
+    spec = np.fft.rfft(segment, axis=-2)[..., freq_idx, :]
+
+    return freq[freq_idx], np.swapaxes(spec, -3, -2)
+
+
+class SegmentCache(object):
+    """
+    SegmentCache for reusing Welch segment spectra across overlapping windows
+
+    Segment spectra are cached per channel and keyed by the absolute sample
+    offset of the segment, recovered from the time stamps. For each window
+    only the segments not already cached are transformed, and segments that
+    are no longer part of the window are evicted. Segments of consecutive
+    windows line up whenever the window displacement is a multiple of the
+    segment step (nperseg - noverlap).
+
+    The cache assumes the value of a sample does not depend on the window it
+    arrived in, e.g. the raw signal or a causally (stream) filtered signal.
+    It is cleared whenever the sampling frequency, channel count or
+    frequency range changes.
+
+    Parameters
+    ----------
+        window: str
+            Window applied to each segment, see scipy.signal.get_window
+
+        nperseg: int
+            Number of samples in each segment
+
+        noverlap: int
+            Number of samples shared by consecutive segments
+    """
+
+    def __init__(self, window, nperseg, noverlap):
+        self.window = window
+        self.nperseg = nperseg
+        self.noverlap = noverlap
+        self.cache_key_ = None
+        self.cache_ = {}
+        self.n_transform_ = 0
+
+    def segment_spectra(self, signal, time_index, fs, freq_range=None):
+        """
+        Welch segment spectra of each channel, see segment_spectra
+
+        Parameters
+        ----------
+            signal: numpy.ndarray, shape: [... x n_sample x n_node]
+                Windowed signal, any leading axes (e.g. bands) are batched
+
+            time_index: numpy.ndarray
+                Time stamp (sec) for each sample
+
+            fs: float
+                Sampling frequency (Hz)
+
+            freq_range: list or None
+                [low, high] frequencies (Hz) to keep, None keeps all
+
+        Returns
+        -------
+            freq: numpy.ndarray, shape: [n_freq]
+                Frequency (Hz) of each spectral bin
+
+            spec: numpy.ndarray, shape: [... x n_freq x n_segment x n_node]
+                Complex spectrum of each segment of each channel
+        """
+
+        cache_key = (fs, signal.shape[:-2] + signal.shape[-1:],
+                     None if freq_range is None else tuple(freq_range))
+        if cache_key != self.cache_key_:
+            self.cache_key_ = cache_key
+            self.cache_ = {}
+
+        # Absolute offset of every segment in the window
+        step = self.nperseg - self.noverlap
+        n_segment = (signal.shape[-2] - self.noverlap) // step
+        if n_segment < 1:
+            raise ValueError('Signal is shorter than one segment')
+        abs_start = int(np.round(time_index[0] * fs))
+        offset = [abs_start + seg_ix*step for seg_ix in xrange(n_segment)]
+
+        # Transform from the first segment that is not cached onwards
+        missing = [seg_ix for seg_ix in xrange(n_segment)
+                   if offset[seg_ix] not in self.cache_]
+        if len(missing):
+            first_ix = missing[0]
+            self.freq_, spec = segment_spectra(
+                signal[..., first_ix*step:, :], fs, self.window,
+                self.nperseg, self.noverlap, freq_range)
+            for seg_ix in xrange(first_ix, n_segment):
+                self.cache_[offset[seg_ix]] = spec[..., seg_ix-first_ix, :]
+            self.n_transform_ += n_segment - first_ix
+
+        # Evict segments that left the window
+        keep = set(offset)
+        for seg_offset in self.cache_.keys():
+            if seg_offset not in keep:
+                del self.cache_[seg_offset]
+
+        spec = np.stack([self.cache_[seg_offset] for seg_offset in offset],
+                        axis=-2)
+
+        return self.freq_, spec
+
+
+class SpectralCache(object):
+    """
+    SpectralCache for sharing the spectra of a window between pipes
+
+    Pipes linked to the same upstream pipe each receive a copy of the same
+    window. The upstream pipe opens the window in the cache, under a token
+    drawn afresh for every packet it yields, before sending it downstream
+    and releases it once every downstream pipe has run. Pipes are sent
+    packets synchronously, so a consumer always runs within the innermost
+    open window, that of the pipe that yielded its packet. A spectrum
+    computed by one consumer is stored under that window and the transform
+    parameters, so any other consumer requesting the same transform reuses
+    it, while consumers of another pipe (even one with identical parameters)
+    never do. Pipes run outside an open window compute their spectra
+    without sharing.
+
+    Shared spectra are returned read-only, consumers must copy before
+    modifying them.
+    """
+
+    def __init__(self):
+        self.window_ = []
+        self.cache_ = {}
+        self.n_window_ = 0
+        self.n_hit_ = 0
+        self.n_miss_ = 0
+
+    def open_window(self):
+        """Open the window of a yielded packet, returning its token"""
+        self.n_window_ += 1
+        self.window_.append(self.n_window_)
+
+        return self.n_window_
+
+    def spectrum(self, signal_packet, transform_key, transform):
+        """
+        Spectrum of the window, computed by transform on the first request
+
+        Parameters
+        ----------
+            signal_packet: dict
+                Signal packet holding the window
+
+            transform_key: tuple
+                Name and parameters of the transform (e.g. FFT length,
+                window, tapers) identifying the spectrum
+
+            transform: function
+                Maps the data of the window to its spectrum, a numpy.ndarray
+                or a tuple of numpy.ndarray
+
+        Returns
+        -------
+            spectrum: numpy.ndarray or tuple of numpy.ndarray
+                Spectrum of the window, read-only when shared
+        """
+
+        hkey = signal_packet.keys()[0]
+        data = signal_packet[hkey]['data']
+        if not self.window_:
+            return transform(data)
+
+        cache_key = (self.window_[-1], transform_key, data.shape)
+        if cache_key in self.cache_:
+            self.n_hit_ += 1
+            return self.cache_[cache_key]
+        self.n_miss_ += 1
+
+        spectrum = transform(data)
+        for value in (spectrum if isinstance(spectrum, tuple)
+                      else (spectrum,)):
+            value.flags.writeable = False
+        self.cache_[cache_key] = spectrum
+
+        return spectrum
+
+    def release(self, window_token):
+        """Close the window of window_token and free its spectra"""
+        self.window_.remove(window_token)
+        for cache_key in self.cache_.keys():
+            if cache_key[0] == window_token:
+                del self.cache_[cache_key]
+
+
+# Spectra of the windows currently being processed
+_SPECTRAL_CACHE = SpectralCache()
+
+
+def shared_spectrum(signal_packet, transform_key, transform):
+    """Spectrum of the window shared between pipes, see SpectralCache"""
+    return _SPECTRAL_CACHE.spectrum(signal_packet, transform_key, transform)
+
+
+def open_spectra():
+    """Open a window for shared spectra, see SpectralCache"""
+    return _SPECTRAL_CACHE.open_window()
+
+
+def release_spectra(window_token):
+    """Free the shared spectra of the window, see SpectralCache"""
+    _SPECTRAL_CACHE.release(window_token)
@@ -0,0 +1,151 @@
+"""
+Tests of band-stacked signals, as yielded by FilterBank, through the pipes
+
+Every pipe must treat a signal of shape [n_band x n_sample x n_node] as a
+batch of independent bands, matching the pipe applied to each band alone.
+"""
+
+from __future__ import division
+import unittest
+import numpy as np
+
+from dyne.preproc.filters import (EllipticFilter, LineNoiseFilter, FilterBank,
+                                  CommonAvgRef, PreWhiten)
+from dyne.preproc.reference import Rereference
+from dyne.preproc.resample import Decimate
+from dyne.adjacency.correlation import XCorrMag, CorrMag
+from dyne.adjacency.coherence import WelchCoh, MTCoh
+from dyne.adjacency.phase import PLV
+from dyne.adjacency.causality import Granger
+
+FS = 256.
+N_SAMPLE = 512
+N_NODE = 4
+BANDS = [[4., 8.], [8., 16.], [16., 32.]]
+
+
+def _packet(data, time_index, band=True):
+    """Signal packet of a window, with a band axis when band is set"""
+    meta = {'ax_0': {'label': 'Time (sec)', 'index': time_index},
+            'ax_1': {'label': 'Nodes',
+                     'index': np.array(['n%d' % ix
+                                        for ix in xrange(N_NODE)])}}
+    if band:
+        meta['band'] = {'label': 'Frequency band (Hz)',
+                        'index': np.array(BANDS, dtype=np.float)}
+
+    return {'signal': {'data': data, 'meta': meta}}
+
+
+class TestBandAxis(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.signal = rng.randn(len(BANDS), 4*N_SAMPLE, N_NODE)
+        self.signal += 0.5*self.signal[..., :1]
+        self.time_index = np.arange(4*N_SAMPLE) / FS
+
+    def _windows(self, n_win, win_disp):
+        """Overlapping windows of the band-stacked signal"""
+        for win_ix in xrange(n_win):
+            win_slice = slice(win_ix*win_disp, win_ix*win_disp + N_SAMPLE)
+            yield (self.signal[:, win_slice, :],
+                   self.time_index[win_slice])
+
+    def _check_pipe(self, make_pipe, n_win=1, win_disp=N_SAMPLE//4):
+        """Compare the pipe on band-stacked windows to each band alone"""
+        band_pipe = make_pipe()
+        single_pipe = [make_pipe() for _ in BANDS]
+        for data, time_index in self._windows(n_win, win_disp):
+            band_out = band_pipe._pipe_as_flow(
+                _packet(data.copy(), time_index.copy()))['signal']
+            self.assertIn('band', band_out['meta'])
+
+            for band_ix, pipe in enumerate(single_pipe):
+                single_out = pipe._pipe_as_flow(
+                    _packet(data[band_ix].copy(), time_index.copy(),
+                            band=False))['signal']
+                self.assertEqual(band_out['data'].shape[1:],
+                                 single_out['data'].shape)
+                np.testing.assert_allclose(band_out['data'][band_ix],
+                                           single_out['data'],
+                                           rtol=1e-8, atol=1e-10)
+                for ax in ['ax_0', 'ax_1']:
+                    if ax in single_out['meta']:
+                        np.testing.assert_array_equal(
+                            band_out['meta'][ax]['index'],
+                            single_out['meta'][ax]['index'])
+
+    def test_elliptic_filter(self):
+        self._check_pipe(lambda: EllipticFilter([20.], [30.], 0.5, 40.))
+
+    def test_elliptic_filter_stream(self):
+        self._check_pipe(
+            lambda: EllipticFilter([20.], [30.], 0.5, 40., stream=True),
+            n_win=4)
+
+    def test_line_noise_filter(self):
+        self._check_pipe(lambda: LineNoiseFilter(60., 1, 30.))
+
+    def test_line_noise_filter_stream(self):
+        self._check_pipe(lambda: LineNoiseFilter(60., 1, 30., stream=True),
+                         n_win=4)
+
+    def test_common_avg_ref(self):
+        self._check_pipe(CommonAvgRef)
+
+    def test_prewhiten(self):
+        self._check_pipe(lambda: PreWhiten(1))
+        self._check_pipe(lambda: PreWhiten(3))
+
+    def test_rereference(self):
+        self._check_pipe(lambda: Rereference('car'))
+        self._check_pipe(lambda: Rereference('bipolar',
+                                             [['n0', 'n1'], ['n2', 'n3']]))
+
+    def test_decimate(self):
+        self._check_pipe(lambda: Decimate(2))
+
+    def test_decimate_stream(self):
+        self._check_pipe(lambda: Decimate(2, stream=True), n_win=4)
+
+    def test_filter_bank_rejects_band_axis(self):
+        data, time_index = next(self._windows(1, 0))
+        pipe = FilterBank([[4., 8.]], 2., 0.5, 40.)
+        self.assertRaises(ValueError, pipe._pipe_as_flow,
+                          _packet(data, time_index))
+
+    def test_xcorr_mag(self):
+        self._check_pipe(lambda: XCorrMag(max_lag=0.01))
+        self._check_pipe(lambda: XCorrMag(max_lag=0.5))
+        self._check_pipe(lambda: XCorrMag(max_lag=0.5, mem_limit=1e-3))
+
+    def test_corr_mag(self):
+        self._check_pipe(CorrMag)
+
+    def test_welch_coh(self):
+        self._check_pipe(lambda: WelchCoh('hanning', 0.5, 0.5, [4., 32.]))
+
+    def test_welch_coh_cache_segments(self):
+        self._check_pipe(lambda: WelchCoh('hanning', 0.5, 0.5, [4., 32.],
+                                          cache_segments=True),
+                         n_win=4, win_disp=int(FS//4))
+
+    def test_mt_coh(self):
+        self._check_pipe(lambda: MTCoh(4., 5, [4., 32.]))
+
+    def test_coherence_rejects_cf_list_with_band_axis(self):
+        data, time_index = next(self._windows(1, 0))
+        for pipe in [WelchCoh('hanning', 0.5, 0.5, [[4., 8.], [8., 16.]]),
+                     MTCoh(4., 5, [[4., 8.], [8., 16.]])]:
+            self.assertRaises(ValueError, pipe._pipe_as_flow,
+                              _packet(data, time_index))
+
+    def test_plv(self):
+        self._check_pipe(PLV)
+
+    def test_granger(self):
+        self._check_pipe(lambda: Granger(2))
+
+
+if __name__ == '__main__':
+    unittest.main()
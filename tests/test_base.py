@@ -0,0 +1,89 @@
+"""
+Tests of the pipe machinery shared by every pipe
+"""
+
+from __future__ import division
+import copy
+import unittest
+import numpy as np
+
+from dyne.base import LoggerPipe
+from dyne.graphtools import degree, expand
+from dyne.interface.randgen import MvarNormalNoise
+from dyne.adjacency.correlation import Corr
+from dyne.adjacency.coherence import WelchCoh, MTCoh
+from dyne.nodetopo.centrality import DegrCentral
+
+
+class _Keep(LoggerPipe):
+    """Keep a copy of every packet received"""
+
+    def __init__(self):
+        self.packet_ = []
+
+    def _pipe_as_flow(self, signal_packet):
+        self.packet_.append(copy.deepcopy(signal_packet))
+        return signal_packet
+
+    def get_valid_link(self):
+        return []
+
+
+class TestPrecision(unittest.TestCase):
+    def test_condensed_float32(self):
+        np.random.seed(0)
+        source = MvarNormalNoise(5, 400, 100, 100)
+        adj_pipe = Corr(condensed=True)
+        node_pipe = DegrCentral()
+        adj_keep, node_keep = _Keep(), _Keep()
+        for pipe in [source, adj_pipe, node_pipe, adj_keep, node_keep]:
+            pipe.set_dtype(np.float32)
+
+        source.link([adj_pipe])
+        adj_pipe.link([node_pipe, adj_keep])
+        node_pipe.link([node_keep])
+        adj_keep.link([])
+        node_keep.link([])
+        source.apply_pipe_as_source()
+
+        self.assertEqual(len(adj_keep.packet_), 4)
+        for packet in adj_keep.packet_:
+            hkey = packet.keys()[0]
+            diag = packet[hkey]['meta']['condensed']['index']
+            self.assertEqual(packet[hkey]['data'].dtype, np.float32)
+            self.assertEqual(diag.dtype, np.float32)
+            self.assertEqual(expand(packet[hkey]['data'], diag).dtype,
+                             np.float32)
+            self.assertEqual(degree(packet).dtype, np.float32)
+        for packet in node_keep.packet_:
+            self.assertEqual(packet.values()[0]['data'].dtype, np.float32)
+
+    def test_coherence_float32(self):
+        rng = np.random.RandomState(0)
+        signal = rng.randn(512, 4)
+        meta = {'ax_0': {'label': 'Time (sec)',
+                         'index': np.arange(512) / 256.},
+                'ax_1': {'label': 'Nodes', 'index': np.arange(4)}}
+        for make_pipe in [
+                lambda condensed: WelchCoh('hanning', 0.5, 0.5, [4., 32.],
+                                           condensed=condensed),
+                lambda condensed: MTCoh(4., 5, [[4., 8.], [8., 32.]],
+                                        condensed=condensed)]:
+            for condensed in [False, True]:
+                pipe, ref_pipe = make_pipe(condensed), make_pipe(condensed)
+                pipe.set_dtype(np.float32)
+                ref = ref_pipe._pipe_as_flow(
+                    {'signal': {'data': signal, 'meta': meta}})['signal']
+                adj = []
+                for _ in xrange(2):
+                    adj.append(pipe._pipe_as_flow(
+                        {'signal': {'data': signal.astype(np.float32),
+                                    'meta': meta}})['signal']['data'])
+                    self.assertEqual(adj[-1].dtype, np.float32)
+                    np.testing.assert_allclose(adj[-1], ref['data'],
+                                               rtol=1e-5, atol=1e-6)
+                self.assertTrue(np.may_share_memory(adj[0], adj[1]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,125 @@
+"""
+Tests of the graph utilities
+"""
+
+from __future__ import division
+import unittest
+import numpy as np
+import scipy.sparse as sp
+
+from dyne.graphtools import synchronizability, condense
+from dyne.adjacency import correlation
+from dyne.adjacency.correlation import Corr, CorrMag, XCorrMag
+from dyne.adjacency.coherence import WelchCoh, MTCoh
+from dyne.adjacency.phase import PLI
+
+FS = 256.
+N_SAMPLE = 512
+N_NODE = 5
+BANDS = [[4., 8.], [8., 16.]]
+
+
+def _packet(data, band=False):
+    """Signal packet of a window, with a band axis when band is set"""
+    meta = {'ax_0': {'label': 'Time (sec)',
+                     'index': np.arange(data.shape[-2]) / FS},
+            'ax_1': {'label': 'Nodes',
+                     'index': np.array(['n%d' % ix
+                                        for ix in xrange(data.shape[-1])])}}
+    if band:
+        meta['band'] = {'label': 'Frequency band (Hz)',
+                        'index': np.array(BANDS, dtype=np.float)}
+
+    return {'signal': {'data': data, 'meta': meta}}
+
+
+class TestSynchronizability(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        adj = rng.rand(30, 30)
+        adj[adj < 0.6] = 0
+        self.adj = (adj + adj.T) / 2
+
+    def _check_sparse(self, adj):
+        """Sparse solve must match the dense solve"""
+        np.testing.assert_allclose(synchronizability(sp.csr_matrix(adj)),
+                                   synchronizability(adj), rtol=1e-6)
+
+    def test_sparse_matches_dense(self):
+        self._check_sparse(self.adj)
+
+    def test_sparse_matches_dense_directed(self):
+        adj = self.adj.copy()
+        adj[0, 1:] *= 2
+        self._check_sparse(adj)
+
+    def test_sparse_matches_dense_signed(self):
+        adj = self.adj.copy()
+        sign = np.sign(np.random.RandomState(1).randn(*adj.shape))
+        adj *= np.triu(sign) + np.triu(sign, 1).T
+        self.assertLess(adj.min(), 0)
+        self._check_sparse(adj)
+
+
+
+class TestCondensedPipes(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.RandomState(0)
+        self.signal = rng.randn(len(BANDS), N_SAMPLE, N_NODE)
+        self.signal += 0.5*self.signal[..., :1]
+        self.signal[..., 1] *= -1
+
+    def _check_pipe(self, make_pipe, band=[False, True]):
+        """Edges filled directly must match the condensed full matrix"""
+        for is_band in band:
+            data = self.signal if is_band else self.signal[0]
+            full = make_pipe(False)._pipe_as_flow(
+                _packet(data.copy(), is_band))['signal']
+            cond = make_pipe(True)._pipe_as_flow(
+                _packet(data.copy(), is_band))['signal']
+            edge, diag = condense(full['data'])
+            np.testing.assert_allclose(cond['data'], edge,
+                                       rtol=1e-8, atol=1e-12)
+            np.testing.assert_allclose(cond['meta']['condensed']['index'],
+                                       diag, atol=1e-12)
+
+    def test_corr(self):
+        self._check_pipe(lambda condensed: Corr(condensed=condensed))
+        self._check_pipe(lambda condensed: CorrMag(condensed=condensed))
+
+    def test_corr_row_blocks(self):
+        block_bytes = correlation._BLOCK_BYTES
+        correlation._BLOCK_BYTES = 1
+        try:
+            self._check_pipe(lambda condensed: Corr(condensed=condensed))
+        finally:
+            correlation._BLOCK_BYTES = block_bytes
+
+    def test_xcorr_mag(self):
+        self._check_pipe(lambda condensed: XCorrMag(max_lag=0.01,
+                                                    condensed=condensed))
+        self._check_pipe(lambda condensed: XCorrMag(max_lag=0.5,
+                                                    condensed=condensed))
+        self._check_pipe(lambda condensed: XCorrMag(max_lag=0.5,
+                                                    mem_limit=1e-3,
+                                                    condensed=condensed))
+
+    def test_pli(self):
+        self._check_pipe(lambda condensed: PLI(condensed=condensed))
+
+    def test_welch_coh(self):
+        self._check_pipe(lambda condensed: WelchCoh(
+            'hanning', 0.5, 0.5, [4., 32.], condensed=condensed))
+        self._check_pipe(lambda condensed: WelchCoh(
+            'hanning', 0.5, 0.5, BANDS, condensed=condensed), band=[False])
+
+    def test_mt_coh(self):
+        self._check_pipe(lambda condensed: MTCoh(4., 5, [4., 32.],
+                                                 condensed=condensed))
+        self._check_pipe(lambda condensed: MTCoh(4., 5, BANDS,
+                                                 condensed=condensed),
+                         band=[False])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+"""
+Tests of the node topology pipes
+"""
+
+from __future__ import division
+import unittest
+import numpy as np
+
+import dyne.nodetopo.centrality as centrality
+from dyne.graphtools import synchronizability
+
+
+def _packet(adj):
+    """Signal packet of a band-stacked adjacency matrix"""
+    n_node = adj.shape[-1]
+    return {'adj': {'data': adj,
+                    'meta': {'ax_0': {'label': 'Nodes',
+                                      'index': np.arange(n_node)},
+                             'ax_1': {'label': 'Nodes',
+                                      'index': np.arange(n_node)},
+                             'time': {'label': 'Time (sec)', 'index': 0.},
+                             'band': {'label': 'Frequency band (Hz)',
+                                      'index': np.array([[4., 8.],
+                                                         [8., 16.]])}}}}
+
+
+class TestSyncCentral(unittest.TestCase):
+    def setUp(self):
+        adj = np.random.RandomState(0).rand(2, 9, 9)
+        self.adj = (adj + np.swapaxes(adj, -1, -2)) / 2
+
+    def _reference(self):
+        """Remove one node at a time"""
+        base_sync = synchronizability(self.adj)
+        cent = np.zeros(self.adj.shape[:-1])
+        for node_r in xrange(self.adj.shape[-1]):
+            keep_ix = np.delete(np.arange(self.adj.shape[-1]), node_r)
+            mod_sync = synchronizability(
+                self.adj[:, keep_ix[:, np.newaxis], keep_ix])
+            cent[:, node_r] = (mod_sync - base_sync) / base_sync
+
+        return cent[..., np.newaxis]
+
+    def test_batches_match_single_removal(self):
+        batch_bytes = centrality._BATCH_BYTES
+        try:
+            for budget in [batch_bytes, 3*2*8*8*8, 1]:
+                centrality._BATCH_BYTES = budget
+                cent = centrality.SyncCentral()._pipe_as_flow(
+                    _packet(self.adj.copy()))['adj']['data']
+                np.testing.assert_allclose(cent, self._reference(),
+                                           rtol=1e-10, atol=1e-12)
+        finally:
+            centrality._BATCH_BYTES = batch_bytes
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Tests of the prefetching source
+"""
+
+from __future__ import division
+import sys
+import time
+import threading
+import traceback
+import unittest
+import numpy as np
+
+from dyne.base import InterfacePipe
+from dyne.interface.prefetch import PrefetchSignal
+
+
+class _CountSource(InterfacePipe):
+    """Yield n_win windows holding their own window index"""
+
+    def __init__(self, n_win, fail_at=None, delay=0.):
+        self.n_win = n_win
+        self.fail_at = fail_at
+        self.delay = delay
+
+    def _pipe_as_source(self):
+        for win_ix in xrange(self.n_win + 1):
+            time.sleep(self.delay)
+            if win_ix == self.fail_at:
+                _fail_read(win_ix)
+            if win_ix == self.n_win:
+                break
+            yield {'data': np.array([[win_ix]], dtype=np.float),
+                   'meta': {'ax_0': {'label': 'Time (sec)',
+                                     'index': np.array([win_ix])},
+                            'ax_1': {'label': 'Nodes',
+                                     'index': np.array(['n0'])}}}
+
+
+def _fail_read(win_ix):
+    raise IOError('Cannot read window %d' % win_ix)
+
+
+def _prefetch(n_win, fail_at=None, delay=0., n_prefetch=2):
+    return PrefetchSignal('tests.test_prefetch', '_CountSource',
+                          {'n_win': n_win, 'fail_at': fail_at,
+                           'delay': delay}, n_prefetch)
+
+
+class TestPrefetchSignal(unittest.TestCase):
+    def setUp(self):
+        self.n_thread = threading.active_count()
+
+    def test_packet_order(self):
+        pipe = _prefetch(20)
+        win_ix = [packet['data'][0, 0] for packet in pipe._pipe_as_source()]
+        self.assertEqual(win_ix, range(20))
+        self.assertEqual(pipe.n_yield_, 20)
+        self.assertLessEqual(pipe.n_stall_, 20)
+        self.assertEqual(threading.active_count(), self.n_thread)
+
+    def test_no_stall_at_end_of_source(self):
+        pipe = _prefetch(0, delay=0.05)
+        self.assertEqual(list(pipe._pipe_as_source()), [])
+        self.assertEqual(pipe.n_stall_, 0)
+
+    def test_no_stall_at_reader_error(self):
+        pipe = _prefetch(1, fail_at=0, delay=0.05)
+        self.assertRaises(IOError, list, pipe._pipe_as_source())
+        self.assertEqual(pipe.n_stall_, 0)
+
+    def test_consumer_stops_early(self):
+        pipe = _prefetch(100)
+        gen = pipe._pipe_as_source()
+        self.assertEqual(gen.next()['data'][0, 0], 0)
+        self.assertEqual(gen.next()['data'][0, 0], 1)
+        gen.close()
+        self.assertEqual(pipe.n_yield_, 2)
+        self.assertEqual(threading.active_count(), self.n_thread)
+
+    def test_reader_error(self):
+        pipe = _prefetch(10, fail_at=3)
+        gen = pipe._pipe_as_source()
+        for win_ix in xrange(3):
+            self.assertEqual(gen.next()['data'][0, 0], win_ix)
+        try:
+            gen.next()
+        except IOError:
+            frame = traceback.extract_tb(sys.exc_info()[2])
+        else:
+            self.fail('IOError of the reader was not raised')
+        self.assertEqual(frame[-1][2], '_fail_read')
+        self.assertLessEqual(pipe.n_stall_, 3)
+        self.assertEqual(threading.active_count(), self.n_thread)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+"""
+Tests of the preprocessing pipes
+"""
+
+from __future__ import division
+import copy
+import unittest
+import numpy as np
+import scipy.signal as spsig
+
+from dyne.interface.window import SlidingWindow
+from dyne.preproc.resample import Decimate
+
+
+class TestDecimate(unittest.TestCase):
+    def setUp(self):
+        self.fs = 1000.
+        self.signal = np.random.RandomState(0).randn(2100, 3)
+        self.node = np.array(['a', 'b', 'c'])
+
+    def _stream(self, window):
+        """Stream the signal through Decimate, causal filter as reference"""
+        pipe = Decimate(4, stream=True)
+        n_tap = len(pipe.fir_)
+        signal_ext = np.concatenate(
+            (np.repeat(self.signal[:1], n_tap-1, axis=0), self.signal))
+        causal = spsig.lfilter(pipe.fir_, 1., signal_ext, axis=0)[n_tap-1:]
+
+        for win_ix in xrange(len(window)):
+            packet = {'signal': window.signal_packet(self.signal, self.node,
+                                                     win_ix)}
+            out = pipe._pipe_as_flow(copy.deepcopy(packet))['signal']
+
+            win_slice = window.window_slice(win_ix)
+            out_ix = np.arange(0, win_slice.stop, 4)[-out['data'].shape[0]:]
+            self.assertEqual(out['data'].shape, (250, 3))
+            np.testing.assert_allclose(out['data'], causal[out_ix])
+
+    def test_stream_matches_causal_filter(self):
+        self._stream(SlidingWindow(2100, self.fs, 1.0, 0.25))
+
+    def test_stream_one_sample_shift(self):
+        self._stream(SlidingWindow(1100, self.fs, 1.0, 1/self.fs))
+
+
+if __name__ == '__main__':
+    unittest.main()
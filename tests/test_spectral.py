@@ -0,0 +1,87 @@
+"""
+Tests of the spectra shared between pipes
+"""
+
+from __future__ import division
+import copy
+import unittest
+import numpy as np
+
+from dyne import spectral
+from dyne.base import LoggerPipe
+from dyne.interface.randgen import MvarNormalNoise
+from dyne.preproc.filters import EllipticFilter
+from dyne.adjacency.coherence import WelchCoh
+
+
+class _Keep(LoggerPipe):
+    """Keep a copy of every packet received"""
+
+    def __init__(self):
+        self.packet_ = []
+
+    def _pipe_as_flow(self, signal_packet):
+        self.packet_.append(copy.deepcopy(signal_packet))
+        return signal_packet
+
+    def get_valid_link(self):
+        return []
+
+
+class TestSharedSpectra(unittest.TestCase):
+    def _run(self, share_spectra):
+        """
+        Chain identical filters, E1 -> [W1, V1, E2] and E2 -> [W2, V2], so
+        that both windows carry the same upstream hash and time stamps, and
+        siblings W and V share their segment spectra
+        """
+        np.random.seed(0)
+        source = MvarNormalNoise(5, 2000, 500, 250, 250.)
+        filt = [EllipticFilter([40.], [50.], 0.5, 40.) for _ in xrange(2)]
+        adj = [[WelchCoh('hanning', 0.5, 0.5, cf,
+                         share_spectra=share_spectra)
+                for cf in [[4., 30.], [30., 60.]]] for _ in xrange(2)]
+        keep = [[_Keep() for _ in pipes] for pipes in adj]
+
+        source.link([filt[0]])
+        filt[0].link(adj[0] + [filt[1]])
+        filt[1].link(adj[1])
+        for pipes, keeps in zip(adj, keep):
+            for pipe, kp in zip(pipes, keeps):
+                pipe.link([kp])
+                kp.link([])
+        source.apply_pipe_as_source()
+
+        return [[[packet.values()[0]['data'] for packet in kp.packet_]
+                 for kp in keeps] for keeps in keep]
+
+    def test_chained_identical_pipes(self):
+        cache = spectral._SPECTRAL_CACHE
+        n_hit, n_miss = cache.n_hit_, cache.n_miss_
+        unshared = self._run(False)
+        shared = self._run(True)
+
+        # One transform per window at each depth, reused by the sibling
+        self.assertEqual(cache.n_hit_ - n_hit, 2*7)
+        self.assertEqual(cache.n_miss_ - n_miss, 2*7)
+        self.assertEqual(cache.cache_, {})
+        self.assertEqual(cache.window_, [])
+
+        for depth in xrange(2):
+            for pipe_ix in xrange(2):
+                self.assertEqual(len(shared[depth][pipe_ix]), 7)
+                for adj_s, adj_u in zip(shared[depth][pipe_ix],
+                                        unshared[depth][pipe_ix]):
+                    np.testing.assert_array_equal(adj_s, adj_u)
+        self.assertFalse(np.allclose(shared[0][0][0], shared[1][0][0]))
+
+    def test_unshared_outside_pipeline(self):
+        spec = spectral.shared_spectrum(
+            {'signal': {'data': np.ones((4, 2))}}, ('ones',),
+            lambda data: 2*data)
+        self.assertTrue(spec.flags.writeable)
+        self.assertEqual(spectral._SPECTRAL_CACHE.cache_, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
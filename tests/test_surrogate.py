@@ -0,0 +1,105 @@
+"""
+Tests of the surrogate significance pipe
+"""
+
+from __future__ import division
+import copy
+import unittest
+import numpy as np
+
+from dyne.base import LoggerPipe
+from dyne.interface.randgen import MvarNormalNoise
+from dyne.adjacency.surrogate import Surrogate
+
+
+class _Keep(LoggerPipe):
+    """Keep a copy of every packet received"""
+
+    def __init__(self):
+        self.packet_ = []
+
+    def _pipe_as_flow(self, signal_packet):
+        self.packet_.append(copy.deepcopy(signal_packet))
+        return signal_packet
+
+    def get_valid_link(self):
+        return []
+
+
+def _surrogate(n_process, **param):
+    """Surrogate p-values of the condensed correlation"""
+    return Surrogate('dyne.adjacency.correlation', 'Corr',
+                     {'condensed': True}, 20, stat='pvalue',
+                     n_process=n_process, **param)
+
+
+class TestSurrogate(unittest.TestCase):
+    def _run(self, pipe):
+        """Run three windows of coupled noise through the pipe"""
+        np.random.seed(0)
+        source = MvarNormalNoise(4, 300, 100, 100)
+        keep = _Keep()
+        source.link([pipe])
+        pipe.link([keep])
+        keep.link([])
+        source.apply_pipe_as_source()
+
+        return [packet.values()[0] for packet in keep.packet_]
+
+    def test_pool_matches_single_process(self):
+        single = self._run(_surrogate(1))
+        pooled = self._run(_surrogate(3))
+        self.assertEqual(len(pooled), 3)
+        for out_s, out_p in zip(single, pooled):
+            np.testing.assert_array_equal(out_s['data'], out_p['data'])
+            np.testing.assert_array_equal(
+                out_s['meta']['condensed']['index'],
+                out_p['meta']['condensed']['index'])
+
+    def test_pool_kept_across_windows(self):
+        pipe = _surrogate(2)
+        hkey = 'signal'
+        signal = np.random.RandomState(0).randn(100, 4)
+        meta = {'ax_0': {'label': 'Time (sec)',
+                         'index': np.arange(100) / 100.},
+                'ax_1': {'label': 'Nodes', 'index': np.arange(4)}}
+
+        self.assertIsNone(pipe.pool_)
+        pipe._pipe_as_flow({hkey: {'data': signal.copy(), 'meta': meta}})
+        pool = pipe.pool_
+        self.assertIsNotNone(pool)
+        pipe._pipe_as_flow({hkey: {'data': signal.copy(), 'meta': meta}})
+        self.assertIs(pipe.pool_, pool)
+
+        pipe._close_flow()
+        self.assertIsNone(pipe.pool_)
+
+    def test_pool_closed_with_flow(self):
+        pipe = _surrogate(2)
+        self._run(pipe)
+        self.assertIsNone(pipe.pool_)
+
+    def test_two_sided_pvalue(self):
+        rng = np.random.RandomState(0)
+        signal = rng.randn(200, 3)
+        signal[:, 1] = -signal[:, 0] + 0.1*signal[:, 1]
+        meta = {'ax_0': {'label': 'Time (sec)',
+                         'index': np.arange(200) / 100.},
+                'ax_1': {'label': 'Nodes', 'index': np.arange(3)}}
+
+        pvalue = {}
+        for tail in ['two-sided', 'greater']:
+            pipe = Surrogate('dyne.adjacency.correlation', 'Corr', {}, 20,
+                             stat='pvalue', tail=tail)
+            pvalue[tail] = pipe._pipe_as_flow(
+                {'signal': {'data': signal.copy(),
+                            'meta': meta}})['signal']['data']
+        self.assertEqual(pvalue['two-sided'][0, 1], 1 / 21)
+        self.assertEqual(pvalue['greater'][0, 1], 1.)
+
+    def test_rejects_tail(self):
+        self.assertRaises(ValueError, _surrogate, 1, tail='less')
+
+
+if __name__ == '__main__':
+    unittest.main()
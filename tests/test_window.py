@@ -0,0 +1,36 @@
+"""
+Tests of the sliding-window engine
+"""
+
+from __future__ import division
+import unittest
+import numpy as np
+
+from dyne.interface.window import SlidingWindow
+from dyne.interface.randgen import MvarNormalNoise
+
+
+class TestSlidingWindow(unittest.TestCase):
+    def test_overlapping_windows(self):
+        window = SlidingWindow(10, 2., 4, 2, units='sample')
+        self.assertEqual(len(window), 4)
+        self.assertEqual(window.window_slice(3), slice(6, 10))
+        np.testing.assert_allclose(window.time_index(1), [1., 1.5, 2., 2.5])
+
+    def test_gapped_windows(self):
+        window = SlidingWindow(10, 1., 2, 3, units='sample')
+        self.assertEqual(len(window), 3)
+        self.assertEqual([window.window_slice(win_ix)
+                          for win_ix in xrange(len(window))],
+                         [slice(0, 2), slice(3, 5), slice(6, 8)])
+
+    def test_gapped_source(self):
+        source = MvarNormalNoise(3, 100, 10, 25)
+        self.assertEqual(len(source.window_), 4)
+
+    def test_window_longer_than_signal(self):
+        self.assertRaises(ValueError, SlidingWindow, 10, 1., 11, 1, 'sample')
+
+
+if __name__ == '__main__':
+    unittest.main()